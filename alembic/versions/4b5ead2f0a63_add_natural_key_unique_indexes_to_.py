@@ -0,0 +1,146 @@
+"""Add natural key unique indexes to questions and stage questions
+
+Revision ID: 4b5ead2f0a63
+Revises: ae22ab662920
+Create Date: 2026-10-18 08:09:29.395318
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Every row of a (source, year, question_number) group, NULLs equal as in the
+# unique indexes, mapped to the one that is kept
+DUPLICATES = """
+    CREATE TEMPORARY TABLE {table}_duplicates ON COMMIT DROP AS
+    SELECT id, keep_id FROM (
+        SELECT id, first_value(id) OVER (
+            PARTITION BY source, year, question_number ORDER BY {keep_order}
+        ) AS keep_id
+        FROM {table}
+    ) ranked
+    WHERE id <> keep_id
+"""
+
+# Keys under which mock_test.questions (a client-shaped JSON document) holds
+# question ids: as values, or as lists of them; numeric object keys are taken
+# as question ids too. The "id" of an entry under "options" is an option id
+# and left alone.
+QUESTION_ID_KEYS = {"id", "question_id", "questionId", "qid"}
+QUESTION_ID_LIST_KEYS = {"ids", "question_ids", "questionIds"}
+
+
+def _remap_question_ids(node, keep, key=None):
+    # node with every question id found in keep replaced by keep[id]
+    def mapped(value):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, int):
+            return keep.get(value, value)
+        if isinstance(value, str) and value.isdigit() and int(value) in keep:
+            return str(keep[int(value)])
+        return value
+
+    if isinstance(node, dict):
+        return {
+            mapped(k): (
+                mapped(v)
+                if k in QUESTION_ID_KEYS and not (k == "id" and key == "options")
+                else _remap_question_ids(v, keep, k)
+            )
+            for k, v in node.items()
+        }
+    if isinstance(node, list):
+        if key in QUESTION_ID_LIST_KEYS:
+            return [mapped(item) for item in node]
+        # The items of a list belong to the key holding the list
+        return [_remap_question_ids(item, keep, key) for item in node]
+    return node
+
+
+def _remap_mock_tests() -> None:
+    # Mock tests refer to questions by id inside their JSON, so the dropped
+    # duplicates are swapped for the kept rows there as well
+    bind = op.get_bind()
+    keep = dict(
+        bind.execute(sa.text("SELECT id, keep_id FROM questions_duplicates")).all()
+    )
+    if not keep:
+        return
+    rows = bind.execute(
+        sa.text("SELECT id, questions FROM mock_test WHERE questions IS NOT NULL")
+    )
+    changed = []
+    for test_id, questions in rows:
+        remapped = _remap_question_ids(questions, keep)
+        if remapped != questions:
+            changed.append({"id": test_id, "questions": json.dumps(remapped)})
+    if changed:
+        bind.execute(
+            sa.text(
+                "UPDATE mock_test SET questions = CAST(:questions AS json) "
+                "WHERE id = :id"
+            ),
+            changed,
+        )
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b5ead2f0a63'
+down_revision: Union[str, Sequence[str], None] = 'ae22ab662920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Collapse the duplicates of earlier repeated ingests. In the bank the
+    # oldest row stays, as mock tests and offline clients refer to its id;
+    # the others are deleted with their options and get tombstones for delta
+    # sync, and staged rows promoted to them and mock tests point at the kept
+    # row instead.
+    op.execute(DUPLICATES.format(table="questions", keep_order="id"))
+    op.execute(
+        "UPDATE stage_questions SET promoted_question_id = d.keep_id "
+        "FROM questions_duplicates d WHERE promoted_question_id = d.id"
+    )
+    _remap_mock_tests()
+    op.execute(
+        "DELETE FROM options USING questions_duplicates d WHERE question_id = d.id"
+    )
+    op.execute(
+        "INSERT INTO question_tombstones (question_id) "
+        "SELECT id FROM questions_duplicates ON CONFLICT DO NOTHING"
+    )
+    op.execute("DELETE FROM questions USING questions_duplicates d WHERE questions.id = d.id")
+    # In staging, a reviewed (then promoted) copy is kept over the others
+    op.execute(
+        DUPLICATES.format(
+            table="stage_questions",
+            keep_order="reviewed IS TRUE DESC, promoted_question_id IS NOT NULL DESC, id",
+        )
+    )
+    op.execute(
+        "DELETE FROM stage_options USING stage_questions_duplicates d "
+        "WHERE question_id = d.id"
+    )
+    op.execute(
+        "DELETE FROM stage_questions USING stage_questions_duplicates d "
+        "WHERE stage_questions.id = d.id"
+    )
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_index('uq_questions_source_year_question_number', 'questions', ['source', 'year', 'question_number'], unique=True, postgresql_nulls_not_distinct=True)
+    op.create_index('uq_stage_questions_source_year_question_number', 'stage_questions', ['source', 'year', 'question_number'], unique=True, postgresql_nulls_not_distinct=True)
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Deleted duplicates are not restored
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('uq_stage_questions_source_year_question_number', table_name='stage_questions', postgresql_nulls_not_distinct=True)
+    op.drop_index('uq_questions_source_year_question_number', table_name='questions', postgresql_nulls_not_distinct=True)
+    # ### end Alembic commands ###
@@ -0,0 +1,50 @@
+"""Backfill chapter ids of questions from chapter names
+
+Revision ID: e8615c26fc56
+Revises: fa34ed11f33d
+Create Date: 2026-10-18 08:28:43.568286
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Rows written before 29de0187387d have no taxonomy ids. Fill chapter_id (and
+# the chapter's subject_id) by the rule test generation used to join on, the
+# chapter string equal to chapters.formatted_name, where that names exactly
+# one chapter; python -m app.domain.subjects.taxonomy resolves the rest.
+# updated_at moves too, so /api/questions/changes, the bundle fingerprints and
+# the staged question checks see the rows as changed.
+BACKFILL = """
+    UPDATE {table} q
+    SET chapter_id = c.id,
+        subject_id = c.subject_id,
+        updated_at = current_timestamp
+    FROM chapters c
+    WHERE q.chapter_id IS NULL
+      AND c.formatted_name = q.chapter
+      AND NOT EXISTS (
+          SELECT 1 FROM chapters other
+          WHERE other.formatted_name = c.formatted_name AND other.id <> c.id
+      )
+"""
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8615c26fc56'
+down_revision: Union[str, Sequence[str], None] = 'fa34ed11f33d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("questions", "stage_questions"):
+        op.execute(BACKFILL.format(table=table))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data only: the ids stay, as if the taxonomy backfill had set them
+    pass
@@ -1,6 +1,7 @@
-from typing import Literal
+from typing import Annotated, Any, Literal
 
 from pydantic import (
+    BeforeValidator,
     EmailStr,
     HttpUrl,
     PostgresDsn,
@@ -9,6 +10,14 @@ from pydantic import (
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def parse_list(v: Any) -> list[str] | str:
+    if isinstance(v, str) and not v.startswith("["):
+        return [i.strip() for i in v.split(",") if i.strip()]
+    elif isinstance(v, list | str):
+        return v
+    raise ValueError(v)
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -39,6 +48,94 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool, applied to every engine created in app.db.session
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Set when connecting through PgBouncer in transaction pooling mode;
+    # server-side prepared statements do not survive a server switch there
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
+    # Read replicas, comma separated postgresql+psycopg DSNs. GET requests are
+    # served from a replica unless the client wrote within the sticky window
+    POSTGRES_REPLICA_URIS: Annotated[
+        list[PostgresDsn] | str, BeforeValidator(parse_list)
+    ] = []
+    DB_REPLICA_STICKY_SECONDS: int = 5
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+
+    # Warn when one request runs the same statement more than this many
+    # times; DB_QUERY_STRICT raises instead, for use in tests
+    DB_QUERY_REPEAT_THRESHOLD: int = 10
+    DB_QUERY_STRICT: bool = False
+
+    # Production server (gunicorn.conf.py). WEB_WORKERS defaults to one worker
+    # per CPU; each worker runs its own event loop and connection pools, so
+    # size DB_POOL_SIZE + DB_MAX_OVERFLOW against workers x max_connections
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int | None = None
+    WEB_BACKLOG: int = 2048
+    WEB_KEEPALIVE: int = 5
+    WEB_TIMEOUT: int = 60
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    # Recycle a worker after this many requests (0 disables); the jitter
+    # spreads restarts so workers do not all recycle at once
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+
+    # List endpoints page with opaque cursors; ?limit= is capped at the max
+    API_PAGE_SIZE: int = 100
+    API_MAX_PAGE_SIZE: int = 500
+
+    # Delta sync (/api/questions/changes) leaves out changes younger than
+    # this, so transactions still committing are not skipped by a watermark
+    SYNC_SETTLE_SECONDS: float = 5.0
+
+    # Offline bundles (python -m app.domain.questions.bundles) are written to
+    # and served from BUNDLE_DIR; each worker also rebuilds the changed ones
+    # every BUNDLE_REBUILD_INTERVAL seconds (0 disables)
+    BUNDLE_DIR: str = "bundles"
+    BUNDLE_REBUILD_INTERVAL: int = 600
+
+    # Question and option diagram_name values are served from this directory
+    # as <name><ext>; unversioned URLs may be cached for DIAGRAM_MAX_AGE
+    DIAGRAM_DIR: str = "diagrams"
+    DIAGRAM_MAX_AGE: int = 86400
+    # Resized WebP derivatives (?size=) are cached in DIAGRAM_CACHE_DIR and
+    # rendered by a pool of DIAGRAM_WORKERS processes per worker; each worker
+    # also renders the missing ones every DIAGRAM_DERIVATIVE_INTERVAL seconds
+    # (0 disables; python -m app.domain.diagrams.derivatives does it once)
+    DIAGRAM_CACHE_DIR: str = "diagram_cache"
+    DIAGRAM_WORKERS: int = 2
+    DIAGRAM_DERIVATIVE_INTERVAL: int = 900
+
+    # Ids accepted by one batch fetch (GET or POST /api/questions/batch)
+    BATCH_MAX_IDS: int = 500
+
+    # Rows fetched per server-side cursor round trip by question exports
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Bulk create endpoints: items per request, and rows written per
+    # transaction (one multi-row INSERT for questions, one for options)
+    BULK_MAX_ITEMS: int = 5000
+    BULK_CHUNK_SIZE: int = 500
+
+    # Facet counts are cached per worker; a write through this worker drops
+    # them at once, writes elsewhere show up within this many seconds
+    FACETS_CACHE_TTL: int = 60
+    # Same for the subject/chapter/topic names used to resolve question ids
+    TAXONOMY_CACHE_TTL: int = 300
+
+    # Staged question review queue (POST /api/process-questions/claim): most
+    # questions one claim hands out, and how long a reviewer keeps them
+    # (claiming again renews the lease)
+    REVIEW_CLAIM_MAX: int = 100
+    REVIEW_CLAIM_LEASE_SECONDS: int = 1800
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -0,0 +1,31 @@
+from typing import Any, Sequence
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+async def count_facets(
+    session: AsyncSession, columns: Sequence[InstrumentedAttribute]
+) -> dict[str, Any]:
+    # Counts per value of every column in one scan: GROUPING SETS makes one
+    # group per (column, value), and the GROUPING() bitmask tells which
+    # column a result row belongs to (its bit is 0, every other bit is 1).
+    # NULL is counted as a value of its own.
+    stmt = select(*columns, func.grouping(*columns), func.count()).group_by(
+        func.grouping_sets(*(tuple_(column) for column in columns))
+    )
+
+    facets: dict[str, list[dict[str, Any]]] = {column.key: [] for column in columns}
+    for row in await session.execute(stmt):
+        *values, grouping, count = row
+        for position, column in enumerate(columns):
+            if not grouping & (1 << (len(columns) - 1 - position)):
+                facets[column.key].append({"value": values[position], "count": count})
+                break
+
+    for counts in facets.values():
+        counts.sort(key=lambda item: (item["value"] is None, item["value"]))
+    # Every facet partitions the whole table
+    total = sum(item["count"] for item in facets[columns[0].key])
+    return {"total": total, **facets}
@@ -0,0 +1,16 @@
+from sqlalchemy import Integer, cast, func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# Up to 9 leading digits always fit in an INTEGER
+_LEADING_NUMBER = literal_column(r"'^\s*(\d{1,9})'")
+# Values without a leading number sort after every numbered one
+_NO_NUMBER = 2**31 - 1
+
+
+def number_sort_key(value: ColumnElement) -> ColumnElement:
+    # Integer value of the leading digits of a printed number ("12" and
+    # "12a" -> 12). Used as the expression of stored generated columns, and
+    # on the lookup side so an equality hits the same index key.
+    return func.coalesce(
+        cast(func.substring(value, _LEADING_NUMBER), Integer), _NO_NUMBER
+    )
@@ -0,0 +1,91 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, Optional, Sequence, TypeVar
+
+from pydantic_core import to_json
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class KeysetPage(Generic[T]):
+    # A plain class rather than a dataclass: FastAPI runs dataclasses through
+    # asdict(), which would deep-copy the ORM rows
+    def __init__(self, items: list[T], next_cursor: Optional[str] = None) -> None:
+        self.items = items
+        self.next_cursor = next_cursor
+
+
+class ChangeSet(Generic[T]):
+    # One page of a delta sync: rows changed and ids deleted after a
+    # watermark, the watermark to pass next time, and whether more changes
+    # are already waiting past it
+    def __init__(
+        self, items: list[T], deleted: list[int], watermark: str, has_more: bool
+    ) -> None:
+        self.items = items
+        self.deleted = deleted
+        self.watermark = watermark
+        self.has_more = has_more
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(to_json(list(values))).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[ColumnElement]) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError as exc:
+        raise InvalidCursorError("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursorError("Cursor does not match this listing")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        expected = column.type.python_type
+        try:
+            if expected is datetime:
+                value = datetime.fromisoformat(value)
+        except (TypeError, ValueError) as exc:
+            raise InvalidCursorError("Cursor does not match this listing") from exc
+        if not isinstance(value, expected) or (
+            isinstance(value, bool) and expected is not bool
+        ):
+            raise InvalidCursorError("Cursor does not match this listing")
+        decoded.append(value)
+    return decoded
+
+
+async def keyset_paginate(
+    session: AsyncSession,
+    stmt: Select,
+    order_by: Sequence[ColumnElement],
+    *,
+    cursor: Optional[str],
+    limit: int,
+) -> KeysetPage:
+    # Seeks past the last row of the previous page on the (sort key, id)
+    # tuple instead of OFFSET, so with an index on the same columns (after
+    # any equality filters) every page costs the same. The columns must be
+    # NOT NULL and end with a unique one, and the cursor is the opaque
+    # encoding of the last row's values.
+    if cursor:
+        stmt = stmt.where(tuple_(*order_by) > tuple_(*decode_cursor(cursor, order_by)))
+    stmt = stmt.order_by(*order_by).limit(limit + 1)
+
+    rows = list(await session.scalars(stmt))
+    if len(rows) <= limit:
+        return KeysetPage(rows)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return KeysetPage(rows, encode_cursor([getattr(last, c.key) for c in order_by]))
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Checkout wait-time histogram for one named pool
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._timeouts = 0
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        index = len(WAIT_BUCKETS)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+
+        with self._lock:
+            self._buckets[index] += 1
+            self._count += 1
+            self._sum += seconds
+            if timed_out:
+                self._timeouts += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            buckets = list(self._buckets)
+            count, total, timeouts = self._count, self._sum, self._timeouts
+
+        cumulative = 0
+        histogram = []
+        for bound, value in zip((*map(str, WAIT_BUCKETS), "+Inf"), buckets):
+            cumulative += value
+            histogram.append({"le": bound, "count": cumulative})
+
+        return {
+            "checkouts": count,
+            "wait_seconds_total": total,
+            "timeouts": timeouts,
+            "wait_histogram": histogram,
+        }
+
+
+_metrics: dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    if name not in _metrics:
+        _metrics[name] = PoolMetrics()
+    return _metrics[name]
+
+
+class _InstrumentedPoolMixin:
+    # Metrics are looked up by the pool's logging name rather than stored on
+    # the instance, so they survive Pool.recreate() after engine.dispose()
+    def _do_get(self):
+        metrics = get_pool_metrics(self.logging_name or "default")
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.observe(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(name: str, pool: Pool) -> dict[str, Any]:
+    status: dict[str, Any] = {"name": name, "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            # QueuePool counts overflow from -pool_size; only positive values
+            # are connections opened beyond pool_size
+            overflow=max(pool.overflow(), 0),
+        )
+    status.update(get_pool_metrics(name).snapshot())
+    return status
@@ -0,0 +1,109 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Placeholders with an optional cast, as psycopg renders expanded IN lists
+_PLACEHOLDER = re.compile(r"(?:%\(\w+\)s|\$\d+|\?)(?:::\w+)?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RepeatedQueryError(RuntimeError):
+    pass
+
+
+def normalize_statement(statement: str) -> str:
+    # Bound parameters and expanded IN lists vary between otherwise identical
+    # statements (selectinload batches, one lazy load per row); fold them
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class QueryStats:
+    def __init__(self, repeat_threshold: Optional[int], strict: bool = False) -> None:
+        self.repeat_threshold = repeat_threshold
+        self.strict = strict
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+
+        normalized = normalize_statement(statement)
+        self.statements[normalized] += 1
+        # Report once per statement, the first time it crosses the threshold
+        if (
+            self.repeat_threshold is not None
+            and self.statements[normalized] == self.repeat_threshold + 1
+        ):
+            message = (
+                f"Possible N+1: statement ran more than {self.repeat_threshold} "
+                f"times in one request: {normalized[:500]}"
+            )
+            if self.strict:
+                raise RepeatedQueryError(message)
+            logger.warning(message)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats(repeat_threshold: int, strict: bool = False) -> Token:
+    return _current.set(QueryStats(repeat_threshold, strict))
+
+
+def stop_query_stats(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def expect_repeated_queries() -> None:
+    # For deliberate batching, such as one IN query per streamed chunk: stop
+    # N+1 reporting for the rest of the current request
+    stats = _current.get()
+    if stats is not None:
+        stats.repeat_threshold = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    # Takes the sync Engine; pass AsyncEngine.sync_engine for async engines
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,106 @@
+import asyncio
+import itertools
+import logging
+from contextvars import ContextVar, Token
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Set per request by ReplicaRoutingMiddleware; sessions only send reads to a
+# replica while this is True
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+# Seconds the replica is behind the primary; 0 when it has replayed
+# everything it received, or when the DSN points at a primary
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """
+)
+
+
+def set_read_only(value: bool) -> Token:
+    return _read_only.set(value)
+
+
+def reset_read_only(token: Token) -> None:
+    _read_only.reset(token)
+
+
+def is_read_only() -> bool:
+    return _read_only.get()
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class ReplicaSet:
+    def __init__(self, replicas: list[Replica], max_lag_seconds: float) -> None:
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    async def check_lag(self, timeout: float) -> None:
+        for replica in self.replicas:
+            try:
+                async with asyncio.timeout(timeout):
+                    async with replica.engine.connect() as conn:
+                        lag = await conn.scalar(REPLICA_LAG_SQL)
+            except Exception as exc:
+                if replica.healthy:
+                    logger.warning("Replica %s out of rotation: %s", replica.name, exc)
+                replica.healthy = False
+                replica.last_error = str(exc)
+                continue
+
+            replica.lag_seconds = float(lag)
+            replica.last_error = None
+            healthy = replica.lag_seconds <= self.max_lag_seconds
+            if healthy != replica.healthy:
+                logger.warning(
+                    "Replica %s %s rotation, lag %.1fs",
+                    replica.name,
+                    "back in" if healthy else "out of",
+                    replica.lag_seconds,
+                )
+            replica.healthy = healthy
+
+    async def monitor(self, interval: float) -> None:
+        while True:
+            await self.check_lag(timeout=interval)
+            await asyncio.sleep(interval)
+
+    def status(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "last_error": replica.last_error,
+            }
+            for replica in self.replicas
+        ]
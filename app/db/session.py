@@ -1,9 +1,37 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from sqlalchemy import Delete, Insert, Update, create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_status
+from app.db.query_stats import instrument_engine
+from app.db.routing import Replica, ReplicaSet, is_read_only
+
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+def engine_options(pool_name: str) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": pool_name,
+    }
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # psycopg prepares repeated statements server side by default
+        options["connect_args"] = {"prepare_threshold": None}
+    return options
+
+
+# Sync engine for scripts, migrations and init_db
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    **engine_options("primary_sync"),
+)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -12,6 +40,86 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# Async engine for the API; the psycopg dialect picks its async driver here
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncQueuePool,
+    **engine_options("primary"),
+)
+
+replicas = ReplicaSet(
+    [
+        Replica(
+            f"replica_{index}",
+            create_async_engine(
+                str(uri),
+                poolclass=InstrumentedAsyncQueuePool,
+                **engine_options(f"replica_{index}"),
+            ),
+        )
+        for index, uri in enumerate(settings.POSTGRES_REPLICA_URIS)
+    ],
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica in replicas.replicas:
+    instrument_engine(replica.engine.sync_engine)
+
+
+class RoutingSession(Session):
+    # Reads in a read-only request go to one healthy replica, pinned for the
+    # life of the session; everything else, and any flush, uses the primary
+    _replica: Replica | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replicas
+            and is_read_only()
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            if self._replica is None or not self._replica.healthy:
+                self._replica = replicas.choose()
+            if self._replica is not None:
+                return self._replica.engine.sync_engine
+        return async_engine.sync_engine
+
+
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def get_pool_status() -> list[dict[str, Any]]:
+    return [
+        pool_status("primary", async_engine.pool),
+        pool_status("primary_sync", engine.pool),
+        *(
+            pool_status(replica.name, replica.engine.pool)
+            for replica in replicas.replicas
+        ),
+    ]
+
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    for replica in replicas.replicas:
+        await replica.engine.dispose()
+
+
+def reset_engines_after_fork() -> None:
+    # Pools built before a fork must never hand the parent's connections to a
+    # child; give every engine a fresh pool without closing the parent's sockets
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replicas.replicas:
+        replica.engine.sync_engine.dispose(close=False)
+
 
 def get_session():
     session = SessionLocal()
@@ -19,3 +127,8 @@ def get_session():
         yield session
     finally:
         session.close()
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -0,0 +1,78 @@
+import time
+from itertools import chain
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_mapper
+
+# Session.info key holding the names of the tables written in the current
+# transaction
+_WRITTEN_TABLES = "written_tables"
+
+_caches: dict[str, list["TableCache"]] = {}
+
+
+class TableCache:
+    # Caches one result computed from whole tables, per process. The entry
+    # is dropped when a session in this process commits a write to any of
+    # the tables (ORM flushes, and statements whose caller records them with
+    # record_written_tables), and expires after ttl seconds so writes made by
+    # other processes (other gunicorn workers, scripts) show up within that
+    # time.
+    def __init__(self, *tables: str, ttl: float) -> None:
+        self.tables = tables
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires_at: Optional[float] = None
+        # Bumped on invalidation, so a load that overlapped a write does not
+        # store its (possibly older) result
+        self._generation = 0
+        for table in tables:
+            _caches.setdefault(table, []).append(self)
+
+    async def get_or_load(self, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self._expires_at is not None and time.monotonic() < self._expires_at:
+            return self._value
+        generation = self._generation
+        value = await load()
+        if generation == self._generation:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._value = None
+        self._expires_at = None
+
+
+def invalidate_table(table: str) -> None:
+    for cache in _caches.get(table, ()):
+        cache.invalidate()
+
+
+def record_written_tables(session: Session, *tables: str) -> None:
+    # For INSERT/UPDATE/DELETE statements, which the flush listener below
+    # does not see: their callers record the tables. (A do_orm_execute hook
+    # would catch them, but any such listener breaks yield_per together with
+    # selectinload on SQLAlchemy 2.0.)
+    session.info.setdefault(_WRITTEN_TABLES, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session: Session, flush_context: Any) -> None:
+    # new/dirty/deleted still hold the pre-flush state here
+    written = session.info.setdefault(_WRITTEN_TABLES, set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        written.update(table.name for table in object_mapper(instance).tables)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session: Session) -> None:
+    for table in session.info.pop(_WRITTEN_TABLES, ()):
+        invalidate_table(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session: Session) -> None:
+    session.info.pop(_WRITTEN_TABLES, None)
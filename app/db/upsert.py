@@ -0,0 +1,239 @@
+from typing import Any, NamedTuple, Sequence
+
+from sqlalchemy import (
+    CTE,
+    FromClause,
+    Integer,
+    all_,
+    and_,
+    delete,
+    func,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.table_cache import record_written_tables
+
+# Natural key of questions and stage_questions: one row per question number
+# of a paper. The unique indexes treat NULLs as equal (NULLS NOT DISTINCT),
+# so a paper without a source or year is still one paper.
+QUESTION_NATURAL_KEY = ("source", "year", "question_number")
+
+# Columns written when questions and options are copied between tables (or
+# loaded from files); ids, timestamps and the generated sort key are each
+# table's own
+QUESTION_COLUMNS = (
+    "source",
+    "year",
+    "subject",
+    "chapter",
+    "topic",
+    "subject_id",
+    "chapter_id",
+    "topic_id",
+    "question_number",
+    "question_text",
+    "difficulty",
+    "has_diagram",
+    "diagram_description",
+    "diagram_position",
+    "diagram_name",
+    "answer",
+    "ai_answer",
+    "solution",
+    "reviewed",
+)
+# Options are matched by label within their question (unique indexes on
+# options and stage_options), so rewriting a question keeps their ids
+OPTION_NATURAL_KEY = ("question_id", "label")
+
+OPTION_COLUMNS = (
+    "label",
+    "text",
+    "has_diagram",
+    "diagram_description",
+    "diagram_name",
+)
+
+
+def natural_key(row: dict[str, Any]) -> tuple[Any, ...]:
+    return tuple(row[column] for column in QUESTION_NATURAL_KEY)
+
+
+def upsert_statement(model: type, columns: Sequence[str]):
+    # INSERT ... ON CONFLICT (natural key) DO UPDATE: a repeated row replaces
+    # the given columns of the existing one and bumps its updated_at
+    stmt = insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=list(QUESTION_NATURAL_KEY),
+        set_={
+            **{
+                column: stmt.excluded[column]
+                for column in columns
+                if column not in QUESTION_NATURAL_KEY
+            },
+            "updated_at": func.current_timestamp(),
+        },
+    )
+
+
+def unique_labels(options: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # One option per label, the last one winning, as the unique index holds
+    # one; unlabelled options are all kept
+    by_label = {
+        option["label"] if option.get("label") is not None else position: option
+        for position, option in enumerate(options)
+    }
+    return list(by_label.values())
+
+
+def option_upsert_statement(model: type, columns: Sequence[str]):
+    # INSERT ... ON CONFLICT (question_id, label) DO UPDATE: an option whose
+    # question already has its label is updated in place. NULL labels never
+    # conflict, so unlabelled options are always inserted.
+    stmt = insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=list(OPTION_NATURAL_KEY),
+        set_={
+            column: stmt.excluded[column]
+            for column in columns
+            if column not in OPTION_NATURAL_KEY
+        },
+    )
+
+
+async def upsert_questions(
+    session: AsyncSession,
+    question_model: type,
+    option_model: type,
+    items: list[tuple[dict[str, Any], list[dict[str, Any]]]],
+) -> list[int]:
+    # Writes (question row, option rows) pairs by natural key and returns the
+    # question ids in the order of items. A repeated question (in the table
+    # or earlier in items, where the last one wins) is updated in place, and
+    # so are its options with a label it already had, keeping their ids; its
+    # other old options are deleted. One multi-row upsert for the questions,
+    # one for the options and one DELETE. The caller commits.
+    record_written_tables(
+        session.sync_session, question_model.__tablename__, option_model.__tablename__
+    )
+    latest = {natural_key(row): (row, options) for row, options in items}
+    rows = [row for row, _ in latest.values()]
+    stmt = upsert_statement(question_model, list(rows[0])).returning(
+        question_model.id,
+        *(getattr(question_model, column) for column in QUESTION_NATURAL_KEY),
+    )
+    ids = {
+        tuple(key): question_id
+        for question_id, *key in await session.execute(stmt, rows)
+    }
+
+    option_rows = [
+        {**option, "question_id": ids[key]}
+        for key, (_, options) in latest.items()
+        for option in unique_labels(options)
+    ]
+    kept = []
+    if option_rows:
+        # RETURNING makes SQLAlchemy batch the rows into multi-row VALUES
+        # statements instead of a plain executemany
+        stmt = option_upsert_statement(option_model, list(option_rows[0]))
+        kept = list(await session.scalars(stmt.returning(option_model.id), option_rows))
+    await session.execute(
+        delete(option_model).where(
+            option_model.question_id.in_(ids.values()),
+            option_model.id != all_(literal(kept, ARRAY(Integer))),
+        )
+    )
+    return [ids[natural_key(row)] for row, _ in items]
+
+
+class QuestionCopy(NamedTuple):
+    # CTEs of copy_questions(). written: the upserted questions (id and
+    # natural key); links: source row id -> question id; options: the
+    # upserted option ids. replaced deletes the old options of updated
+    # questions that no new option replaced and is referenced by nothing, so
+    # add it with add_cte().
+    written: CTE
+    links: CTE
+    options: CTE
+    replaced: CTE
+
+
+def copy_questions(
+    question_model: type,
+    option_model: type,
+    source: CTE,
+    source_options: FromClause,
+) -> QuestionCopy:
+    # INSERT ... SELECT counterpart of upsert_questions(), for rows already
+    # in the database: source has an id column and QUESTION_COLUMNS, at most
+    # one row per natural key; source_options has OPTION_COLUMNS, an id that
+    # orders them and a question_id pointing at source.id
+    written = (
+        upsert_statement(question_model, QUESTION_COLUMNS)
+        .from_select(
+            QUESTION_COLUMNS, select(*(source.c[name] for name in QUESTION_COLUMNS))
+        )
+        .returning(
+            question_model.id,
+            *(getattr(question_model, name) for name in QUESTION_NATURAL_KEY),
+        )
+        .cte(f"written_{question_model.__tablename__}")
+    )
+    # NULLs match, as in the unique index; question_number is NOT NULL, and
+    # its = lets Postgres hash join
+    links = (
+        select(source.c.id, written.c.id.label("question_id"))
+        .join(
+            written,
+            and_(
+                source.c.question_number == written.c.question_number,
+                source.c.source.is_not_distinct_from(written.c.source),
+                source.c.year.is_not_distinct_from(written.c.year),
+            ),
+        )
+        .cte("links")
+    )
+    # Options by label as in upsert_questions(): the last of a repeated label
+    # in a question, and every unlabelled one
+    ranked = (
+        select(
+            links.c.question_id,
+            source_options.c.id,
+            *(source_options.c[name] for name in OPTION_COLUMNS),
+            func.row_number()
+            .over(
+                partition_by=(links.c.question_id, source_options.c.label),
+                order_by=source_options.c.id.desc(),
+            )
+            .label("label_rank"),
+        )
+        .join(links, source_options.c.question_id == links.c.id)
+        .subquery()
+    )
+    options = (
+        option_upsert_statement(option_model, OPTION_COLUMNS)
+        .from_select(
+            ["question_id", *OPTION_COLUMNS],
+            select(ranked.c.question_id, *(ranked.c[name] for name in OPTION_COLUMNS))
+            .where(or_(ranked.c.label.is_(None), ranked.c.label_rank == 1))
+            .order_by(ranked.c.id),
+        )
+        .returning(option_model.id)
+        .cte(f"written_{option_model.__tablename__}")
+    )
+    # Sees the options as they were before the statement, so it deletes the
+    # old options of updated questions that were not upserted above
+    replaced = (
+        delete(option_model)
+        .where(
+            option_model.question_id == links.c.question_id,
+            option_model.id.not_in(select(options.c.id)),
+        )
+        .cte(f"replaced_{option_model.__tablename__}")
+    )
+    return QuestionCopy(written, links, options, replaced)
@@ -1,9 +1,25 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from fastapi import Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_session
+from app.core.config import settings
+from app.db.session import get_async_session
 
 
-def get_db() -> Generator[Session, None, None]:
-    yield from get_session()
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async for session in get_async_session():
+        yield session
+
+
+class PageParams:
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(
+            None, description="next_cursor from the previous page"
+        ),
+        limit: int = Query(settings.API_PAGE_SIZE, ge=1, le=settings.API_MAX_PAGE_SIZE),
+    ) -> None:
+        self.cursor = cursor
+        self.limit = limit
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Literal, NamedTuple, Optional
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.domain.diagrams.imaging import UnreadableImage, render_webp
+from app.domain.diagrams.repository import DiagramRepository
+from app.domain.diagrams.storage import DiagramFile, diagram_store
+from app.utils.file_lock import try_lock
+
+logger = logging.getLogger(__name__)
+
+DiagramSize = Literal["thumb", "mobile", "webp"]
+
+
+class Variant(NamedTuple):
+    # Max width in pixels (None keeps the original) and WebP quality
+    width: Optional[int]
+    quality: int
+
+
+# Served by ?size= on /api/diagrams/{name}. Width and quality are part of
+# the file names, so changing them here renders new files
+VARIANTS: dict[str, Variant] = {
+    "thumb": Variant(width=240, quality=75),
+    "mobile": Variant(width=720, quality=80),
+    "webp": Variant(width=None, quality=85),
+}
+# Sources Pillow can render; others (SVG) are always served as they are
+RASTER_EXTENSIONS = {".png", ".webp", ".jpg", ".jpeg", ".gif"}
+_DERIVATIVE_NAME = re.compile(r"^([0-9a-f]{32})\..+\.webp$")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    # Created on first use, so each gunicorn worker gets its own after the
+    # fork; the pool spawns rather than forks, as the event loop and
+    # connection pools of this process must not be copied into it
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.DIAGRAM_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class DerivativeCache:
+    # Derivatives on disk under the content digest of their source, so a
+    # replaced source gets new files and stale ones are never served; prune()
+    # removes those. A derivative is rendered once per process at a time,
+    # however many requests ask for it, and a source Pillow cannot decode is
+    # not retried until its content changes (other failures, e.g. of the
+    # file system or the pool, are retried by the next request).
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._pending: dict[Path, asyncio.Future] = {}
+        self._failed: set[str] = set()
+
+    def supports(self, file: DiagramFile) -> bool:
+        return (
+            file.path.suffix.lower() in RASTER_EXTENSIONS
+            and file.digest not in self._failed
+        )
+
+    def path_for(self, file: DiagramFile, size: str) -> Path:
+        width, quality = VARIANTS[size]
+        return self.directory / f"{file.digest}.{size}.w{width or 0}q{quality}.webp"
+
+    async def get(self, file: DiagramFile, size: str) -> Path:
+        target = self.path_for(file, size)
+        if target.exists():
+            return target
+        pending = self._pending.get(target)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render(file, size, target))
+            self._pending[target] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(target, None))
+        # A cancelled request must not cancel the render others wait on
+        await asyncio.shield(pending)
+        return target
+
+    async def _render(self, file: DiagramFile, size: str, target: Path) -> None:
+        width, quality = VARIANTS[size]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                get_pool(), render_webp, str(file.path), str(target), width, quality
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): start a new pool next
+            # time rather than failing every later render
+            shutdown_pool()
+            raise
+        except UnreadableImage:
+            self._failed.add(file.digest)
+            raise
+
+    async def generate(self, names: list[str]) -> dict[str, int]:
+        # Renders every missing derivative of the named diagrams, then drops
+        # files of sources that are no longer among them
+        files = await asyncio.to_thread(diagram_store.find_many, names)
+        found = [file for file in files.values() if file is not None]
+        jobs = [
+            (file, size)
+            for file in found
+            if self.supports(file)
+            for size in VARIANTS
+            if not self.path_for(file, size).exists()
+        ]
+        results = await asyncio.gather(
+            *(self.get(file, size) for file, size in jobs), return_exceptions=True
+        )
+        failed = 0
+        for (file, size), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                failed += 1
+                logger.warning(
+                    "Diagram %s (%s) not rendered: %s", file.name, size, result
+                )
+        removed = await asyncio.to_thread(self.prune, {file.digest for file in found})
+        return {
+            "diagrams": len(found),
+            "rendered": len(jobs) - failed,
+            "failed": failed,
+            "removed": removed,
+        }
+
+    def prune(self, digests: set[str]) -> int:
+        removed = 0
+        if not self.directory.exists():
+            return removed
+        for path in self.directory.iterdir():
+            match = _DERIVATIVE_NAME.match(path.name)
+            if match and match.group(1) not in digests:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+derivative_cache = DerivativeCache(Path(settings.DIAGRAM_CACHE_DIR))
+
+
+async def refresh_derivatives() -> Optional[dict[str, int]]:
+    # One process per cache directory at a time; None when another holds it
+    directory = derivative_cache.directory
+    directory.mkdir(parents=True, exist_ok=True)
+    with try_lock(directory / ".lock") as locked:
+        if not locked:
+            return None
+        async with AsyncSessionLocal() as session:
+            names = await DiagramRepository(session).all_names()
+        return await derivative_cache.generate(names)
+
+
+async def refresh_periodically(interval: float) -> None:
+    while True:
+        try:
+            stats = await refresh_derivatives()
+        except Exception:
+            logger.exception("Diagram derivative refresh failed")
+        else:
+            if stats and (stats["rendered"] or stats["failed"]):
+                logger.info("Diagram derivatives refreshed: %s", stats)
+        await asyncio.sleep(interval)
+
+
+async def main() -> None:
+    # python -m app.domain.diagrams.derivatives
+    argparse.ArgumentParser(
+        description="Render the thumbnail/mobile/WebP derivatives of every "
+        "diagram referenced by questions and options"
+    ).parse_args()
+    try:
+        stats = await refresh_derivatives()
+    finally:
+        shutdown_pool()
+        await dispose_engines()
+    if stats is None:
+        raise SystemExit(f"{settings.DIAGRAM_CACHE_DIR} is being refreshed elsewhere")
+    print(
+        f"{stats['diagrams']} diagrams: {stats['rendered']} derivatives rendered, "
+        f"{stats['failed']} failed, {stats['removed']} stale removed"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
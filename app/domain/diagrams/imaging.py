@@ -0,0 +1,42 @@
+import os
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+# Runs in the derivative process pool: imports nothing from the app, so the
+# spawned workers start with just Pillow loaded
+
+
+class UnreadableImage(Exception):
+    # The source is not an image Pillow can decode; unlike a failed read
+    # of the file, rendering it again will not help
+    pass
+
+
+def _decode(source: str) -> Image.Image:
+    try:
+        with Image.open(source) as image:
+            image.load()
+            return ImageOps.exif_transpose(image)
+    except OSError as exc:
+        # Pillow's decoder errors carry no errno; file system ones do
+        if exc.errno is not None:
+            raise
+        raise UnreadableImage(f"{source}: {exc}") from None
+    except (SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        raise UnreadableImage(f"{source}: {exc}") from None
+
+
+def render_webp(source: str, target: str, width: Optional[int], quality: int) -> None:
+    # Scales the image down to width (never up) and writes it as WebP,
+    # atomically, keeping transparency
+    image = _decode(source)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    if width is not None and image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    image.save(tmp, "WEBP", quality=quality, method=4)
+    os.replace(tmp, target)
@@ -0,0 +1,37 @@
+from typing import Optional
+
+from sqlalchemy import ColumnElement, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.questions.models import Option, Question
+
+
+class DiagramRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def _names(self, *criteria: ColumnElement) -> list[str]:
+        # Distinct diagram names of the matching questions and their options
+        stmt = union(
+            select(Question.diagram_name).where(
+                *criteria, Question.diagram_name.is_not(None)
+            ),
+            select(Option.diagram_name)
+            .join(Question, Option.question_id == Question.id)
+            .where(*criteria, Option.diagram_name.is_not(None)),
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def all_names(self) -> list[str]:
+        return await self._names()
+
+    async def names_for_paper(
+        self, *, year: str, source: Optional[str] = None
+    ) -> list[str]:
+        criteria = [Question.year == year]
+        if source:
+            criteria.append(Question.source == source)
+        return await self._names(*criteria)
+
+    async def names_for_questions(self, ids: list[int]) -> list[str]:
+        return await self._names(Question.id.in_(ids))
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.dependencies import get_db
+from app.domain.diagrams import schemas
+from app.domain.diagrams.derivatives import DiagramSize
+from app.domain.diagrams.services import DiagramService
+from app.domain.diagrams.storage import DiagramFile
+from app.interfaces.api.files import conditional_file_response
+
+router = APIRouter(prefix="/diagrams", tags=["diagrams"])
+
+# Versioned URLs never change content; plain ones are revalidated daily
+VERSIONED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def get_diagram_service(db: AsyncSession = Depends(get_db)) -> DiagramService:
+    return DiagramService(db)
+
+
+def _asset(request: Request, file: DiagramFile) -> schemas.DiagramAsset:
+    path = request.app.url_path_for("get_diagram", name=file.name)
+    return schemas.DiagramAsset(
+        name=file.name,
+        url=f"{path}?v={file.digest}",
+        etag=file.etag,
+        size=file.stat_result.st_size,
+        media_type=file.media_type,
+    )
+
+
+def _manifest(
+    request: Request, files: list[DiagramFile], missing: list[str]
+) -> schemas.DiagramManifest:
+    return schemas.DiagramManifest(
+        items=[_asset(request, file) for file in files], missing=missing
+    )
+
+
+@router.get("/manifest", response_model=schemas.DiagramManifest)
+async def get_paper_diagram_manifest(
+    request: Request,
+    year: str = Query(...),
+    source: str | None = Query(None),
+    service: DiagramService = Depends(get_diagram_service),
+):
+    # Every diagram of a question paper, to prefetch before a test
+    files, missing = await service.get_paper_manifest(year=year, source=source)
+    return _manifest(request, files, missing)
+
+
+@router.post("/manifest", response_model=schemas.DiagramManifest)
+async def post_questions_diagram_manifest(
+    request: Request,
+    ids: list[int] = Body(
+        ...,
+        max_length=settings.BATCH_MAX_IDS,
+        description="JSON array of question ids, e.g. those of a mock test",
+    ),
+    service: DiagramService = Depends(get_diagram_service),
+):
+    files, missing = await service.get_questions_manifest(ids)
+    return _manifest(request, files, missing)
+
+
+@router.get("/{name}", response_class=FileResponse)
+async def get_diagram(
+    name: str,
+    request: Request,
+    v: str | None = Query(None, description="digest from the manifest"),
+    size: DiagramSize | None = Query(
+        None, description="resized WebP derivative instead of the original"
+    ),
+    service: DiagramService = Depends(get_diagram_service),
+):
+    file = await service.get_diagram(name)
+    if file is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Diagram not found"
+        )
+    if v == file.digest:
+        cache_control = VERSIONED_CACHE_CONTROL
+    else:
+        cache_control = f"public, max-age={settings.DIAGRAM_MAX_AGE}"
+
+    path = await service.get_derivative(file, size) if size else None
+    if path is not None:
+        return conditional_file_response(
+            request,
+            path,
+            stat_result=path.stat(),
+            media_type="image/webp",
+            cache_control=cache_control,
+            etag=f'"{file.digest}-{size}"',
+        )
+    if size:
+        # The original in place of a derivative (possibly because rendering
+        # failed this time): not for a year under the derivative's URL
+        cache_control = f"public, max-age={settings.DIAGRAM_MAX_AGE}"
+    return conditional_file_response(
+        request,
+        file.path,
+        stat_result=file.stat_result,
+        media_type=file.media_type,
+        cache_control=cache_control,
+        etag=file.etag,
+    )
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DiagramAsset(BaseModel):
+    name: str
+    # Versioned URL: cacheable forever, changes when the file does. Append
+    # &size=thumb, mobile or webp for a WebP derivative
+    url: str
+    etag: str
+    size: int
+    media_type: Optional[str] = None
+
+
+class DiagramManifest(BaseModel):
+    items: list[DiagramAsset]
+    # Diagram names referenced by the questions with no file on the server
+    missing: list[str] = []
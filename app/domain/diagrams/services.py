@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.diagrams.derivatives import DiagramSize, derivative_cache
+from app.domain.diagrams.repository import DiagramRepository
+from app.domain.diagrams.storage import (
+    DiagramFile,
+    diagram_store,
+    normalize_diagram_name,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DiagramService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.repo = DiagramRepository(session)
+
+    async def get_diagram(self, name: str) -> Optional[DiagramFile]:
+        return await asyncio.to_thread(diagram_store.find, name)
+
+    async def get_derivative(
+        self, file: DiagramFile, size: DiagramSize
+    ) -> Optional[Path]:
+        # Rendered in the process pool on first request. None means serve the
+        # original: a vector source, one Pillow cannot read, or one already
+        # smaller than the derivative (line art often compresses better as
+        # PNG than as full-size WebP)
+        if not derivative_cache.supports(file):
+            return None
+        try:
+            path = await derivative_cache.get(file, size)
+        except Exception as exc:
+            logger.warning("Diagram %s (%s) not rendered: %s", file.name, size, exc)
+            return None
+        if path.stat().st_size >= file.stat_result.st_size:
+            return None
+        return path
+
+    async def _manifest(self, names: list[str]) -> tuple[list[DiagramFile], list[str]]:
+        # Returns the files found, by name, and the names without one
+        names = sorted(
+            {name for name in map(normalize_diagram_name, names) if name is not None}
+        )
+        files = await asyncio.to_thread(diagram_store.find_many, names)
+        return (
+            [file for file in files.values() if file is not None],
+            [name for name, file in files.items() if file is None],
+        )
+
+    async def get_paper_manifest(
+        self, *, year: str, source: Optional[str] = None
+    ) -> tuple[list[DiagramFile], list[str]]:
+        return await self._manifest(
+            await self.repo.names_for_paper(year=year, source=source)
+        )
+
+    async def get_questions_manifest(
+        self, ids: list[int]
+    ) -> tuple[list[DiagramFile], list[str]]:
+        return await self._manifest(await self.repo.names_for_questions(ids))
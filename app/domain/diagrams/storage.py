@@ -0,0 +1,88 @@
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+# Tried in this order when diagram_name has no extension ("2025-1")
+DIAGRAM_EXTENSIONS = (".png", ".webp", ".jpg", ".jpeg", ".svg", ".gif")
+# Plain file names only: no separators, so a name cannot leave the directory
+_DIAGRAM_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,254}$")
+# Placeholders the question JSON uses for "no diagram"
+_NO_DIAGRAM = {"", "none", "null"}
+
+
+def normalize_diagram_name(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    if value.lower() in _NO_DIAGRAM or not _DIAGRAM_NAME.match(value):
+        return None
+    return value
+
+
+class DiagramFile:
+    def __init__(
+        self, name: str, path: Path, stat_result: os.stat_result, digest: str
+    ) -> None:
+        self.name = name
+        self.path = path
+        self.stat_result = stat_result
+        # SHA-256 of the content, truncated: the strong ETag and the ?v= of
+        # versioned URLs
+        self.digest = digest
+        self.media_type = mimetypes.guess_type(path.name)[0]
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+
+class DiagramStore:
+    # Maps diagram_name values to image files in one directory. Lookups
+    # stat the disk, so files added or replaced show up at once; digests
+    # are cached per file and recomputed when its mtime or size changes.
+    # Blocking: call through asyncio.to_thread.
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._digests: dict[Path, tuple[int, int, str]] = {}
+
+    def _candidates(self, name: str) -> list[Path]:
+        if Path(name).suffix.lower() in DIAGRAM_EXTENSIONS:
+            return [self.directory / name]
+        return [self.directory / f"{name}{ext}" for ext in DIAGRAM_EXTENSIONS]
+
+    def _digest(self, path: Path, stat_result: os.stat_result) -> str:
+        key = (stat_result.st_mtime_ns, stat_result.st_size)
+        cached = self._digests.get(path)
+        if cached is not None and cached[:2] == key:
+            return cached[2]
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()[:32]
+        self._digests[path] = (*key, digest)
+        return digest
+
+    def find(self, name: str) -> Optional[DiagramFile]:
+        name = normalize_diagram_name(name)
+        if name is None:
+            return None
+        for path in self._candidates(name):
+            try:
+                stat_result = path.stat()
+            except FileNotFoundError:
+                continue
+            if stat.S_ISREG(stat_result.st_mode):
+                return DiagramFile(
+                    name, path, stat_result, self._digest(path, stat_result)
+                )
+        return None
+
+    def find_many(self, names: list[str]) -> dict[str, Optional[DiagramFile]]:
+        return {name: self.find(name) for name in names}
+
+
+diagram_store = DiagramStore(Path(settings.DIAGRAM_DIR))
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import async_engine, dispose_engines
+from app.domain.process_questions.models import (
+    StageOption,
+    StageQuestion,
+    StageQuestionCheck,
+    StageQuestionIssue,
+)
+from app.domain.process_questions.rules import (
+    Issue,
+    OptionRow,
+    QuestionRow,
+    check_questions,
+)
+
+# One run at a time per database (a session advisory lock, held until the
+# connection closes): two runs replacing the same questions' issues could
+# leave both sets behind
+_LOCK_KEY = func.hashtext(StageQuestionCheck.__tablename__)
+
+
+class Chunk(NamedTuple):
+    # Questions read for one round of checks: their rows for the rules and
+    # the updated_at each had, recorded once their issues are written
+    questions: list[QuestionRow]
+    updated_at: dict[int, datetime]
+
+
+async def read_chunk(
+    connection: AsyncConnection, *, after: int, size: int
+) -> Optional[Chunk]:
+    # The next size questions by id that were never checked or changed since
+    # (keyset on id, so each round is an index range scan), with their options
+    stmt = (
+        select(
+            StageQuestion.id,
+            StageQuestion.answer,
+            StageQuestion.ai_answer,
+            StageQuestion.has_diagram,
+            StageQuestion.diagram_name,
+            StageQuestion.updated_at,
+        )
+        .outerjoin(
+            StageQuestionCheck, StageQuestionCheck.question_id == StageQuestion.id
+        )
+        .where(
+            StageQuestion.id > after,
+            or_(
+                StageQuestionCheck.question_id.is_(None),
+                StageQuestionCheck.checked_updated_at.is_distinct_from(
+                    StageQuestion.updated_at
+                ),
+            ),
+        )
+        .order_by(StageQuestion.id)
+        .limit(size)
+    )
+    rows = (await connection.execute(stmt)).all()
+    if not rows:
+        return None
+
+    options = defaultdict(list)
+    option_stmt = (
+        select(
+            StageOption.question_id,
+            StageOption.label,
+            StageOption.text,
+            StageOption.has_diagram,
+            StageOption.diagram_name,
+        )
+        .where(StageOption.question_id.in_([row.id for row in rows]))
+        .order_by(StageOption.id)
+    )
+    for question_id, *option in await connection.execute(option_stmt):
+        options[question_id].append(OptionRow(*option))
+    return Chunk(
+        [QuestionRow(*row[:5], options[row.id]) for row in rows],
+        {row.id: row.updated_at for row in rows},
+    )
+
+
+async def write_issues(
+    connection: AsyncConnection, chunk: Chunk, issues: list[Issue]
+) -> bool:
+    # Replaces the chunk's issues and records it as checked, in one
+    # transaction. False when a question was deleted meanwhile: the chunk is
+    # left for the next run.
+    ids = list(chunk.updated_at)
+    checked = pg_insert(StageQuestionCheck)
+    try:
+        await connection.execute(
+            delete(StageQuestionIssue).where(StageQuestionIssue.question_id.in_(ids))
+        )
+        if issues:
+            await connection.execute(
+                insert(StageQuestionIssue),
+                [issue._asdict() for issue in issues],
+            )
+        await connection.execute(
+            checked.on_conflict_do_update(
+                index_elements=[StageQuestionCheck.question_id],
+                set_={
+                    "checked_updated_at": checked.excluded.checked_updated_at,
+                    "checked_at": func.current_timestamp(),
+                },
+            ),
+            [
+                {"question_id": question_id, "checked_updated_at": updated_at}
+                for question_id, updated_at in chunk.updated_at.items()
+            ],
+        )
+        await connection.commit()
+    except IntegrityError:
+        await connection.rollback()
+        return False
+    return True
+
+
+async def run_checks(
+    connection: AsyncConnection,
+    pool: ProcessPoolExecutor,
+    *,
+    chunk_size: int,
+    ahead: int,
+) -> dict[str, int]:
+    # Reads chunks and hands them to the pool, up to ahead chunks ahead of
+    # the one whose issues are being written
+    loop = asyncio.get_running_loop()
+    stats = {"checked": 0, "flagged": 0, "issues": 0, "skipped": 0}
+    pending: deque = deque()
+    after = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < ahead:
+                chunk = await read_chunk(connection, after=after, size=chunk_size)
+                if chunk is None:
+                    exhausted = True
+                    break
+                after = chunk.questions[-1].id
+                pending.append(
+                    (
+                        chunk,
+                        loop.run_in_executor(pool, check_questions, chunk.questions),
+                    )
+                )
+            if not pending:
+                break
+
+            chunk, checked = pending.popleft()
+            issues = await checked
+            if not await write_issues(connection, chunk, issues):
+                stats["skipped"] += len(chunk.questions)
+                continue
+            stats["checked"] += len(chunk.questions)
+            stats["flagged"] += len({issue.question_id for issue in issues})
+            stats["issues"] += len(issues)
+    finally:
+        for _, checked in pending:
+            checked.cancel()
+    return stats
+
+
+async def main() -> None:
+    # python -m app.domain.process_questions.checks
+    parser = argparse.ArgumentParser(
+        description="Run the rule checks over staged questions changed since "
+        "the last run and record what they find in stage_question_issues"
+    )
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="check every staged question again, e.g. after the rules changed",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    # Spawned, not forked: the workers must not inherit the event loop or
+    # the connection pools
+    pool = ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        async with async_engine.connect() as connection:
+            locked = await connection.scalar(
+                select(func.pg_try_advisory_lock(_LOCK_KEY))
+            )
+            await connection.commit()
+            if not locked:
+                raise SystemExit("The staged question checks are running elsewhere")
+            if args.all:
+                await connection.execute(delete(StageQuestionCheck))
+                await connection.commit()
+            stats = await run_checks(
+                connection, pool, chunk_size=args.chunk_size, ahead=args.workers * 2
+            )
+    finally:
+        pool.shutdown(cancel_futures=True)
+        await dispose_engines()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{stats['checked']} questions checked in {elapsed:.1f}s: "
+        f"{stats['flagged']} flagged with {stats['issues']} issues"
+        + (
+            f", {stats['skipped']} skipped (deleted meanwhile)"
+            if stats["skipped"]
+            else ""
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
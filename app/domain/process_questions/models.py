@@ -1,7 +1,9 @@
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -12,6 +14,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 
 from app.db.base import Base
+from app.db.ordering import number_sort_key
 
 
 class StageQuestion(Base):
@@ -20,12 +23,28 @@ class StageQuestion(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Main fields from the root JSON
-    source = Column(String, nullable=True, index=True)
-    year = Column(String, nullable=True, index=True)
-    subject = Column(String, nullable=True, index=True)
+    source = Column(String, nullable=True)
+    year = Column(String, nullable=True)
+    subject = Column(String, nullable=True)
     chapter = Column(String, nullable=True, index=True)
     topic = Column(String, nullable=True, index=True)
+    # Taxonomy ids resolved from the names above on write (and by the
+    # app.domain.subjects.taxonomy backfill); joins and id filters use these,
+    # the names are kept for display
+    subject_id = Column(
+        Integer, ForeignKey("subjects.id", ondelete="SET NULL"), index=True
+    )
+    chapter_id = Column(
+        Integer, ForeignKey("chapters.id", ondelete="SET NULL"), index=True
+    )
+    topic_id = Column(Integer, ForeignKey("topics.id", ondelete="SET NULL"), index=True)
     question_number = Column(String, nullable=False, index=True)
+    # Paper order: filled in by Postgres from question_number on every write
+    question_sort_key = Column(
+        Integer,
+        Computed(number_sort_key(question_number), persisted=True),
+        nullable=False,
+    )
     question_text = Column(Text, nullable=True)
     difficulty = Column(String, nullable=True)
     has_diagram = Column(Boolean, default=False)
@@ -36,6 +55,11 @@ class StageQuestion(Base):
     ai_answer = Column(String, nullable=True)
     solution = Column(Text)
     reviewed = Column(Boolean, default=False)
+    # Bank question this row was promoted to (POST /api/questions/promote
+    # with staged="mark"); marked rows are skipped by later promotions
+    promoted_question_id = Column(
+        Integer, ForeignKey("questions.id", ondelete="SET NULL"), index=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP, server_default=func.current_timestamp()
@@ -46,9 +70,48 @@ class StageQuestion(Base):
         onupdate=func.current_timestamp(),
     )
 
-    # Relationship to options
+    # Relationship to options, never lazy loaded (see Question.options)
     options = relationship(
-        "StageOption", back_populates="question", cascade="all, delete-orphan"
+        "StageOption",
+        back_populates="question",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+    )
+
+    # As for questions, but the review queue index is on id alone: claims
+    # (POST /api/process-questions/claim) take the lowest unreviewed ids,
+    # and reviewed rows drop out of it instead of being scanned past
+    __table_args__ = (
+        # Natural key: ingesting a question again updates it (app.db.upsert)
+        Index(
+            "uq_stage_questions_source_year_question_number",
+            "source",
+            "year",
+            "question_number",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_stage_questions_year_question_sort_key",
+            "year",
+            "question_sort_key",
+            "question_number",
+            "id",
+        ),
+        Index(
+            "ix_stage_questions_source_year_question_sort_key",
+            "source",
+            "year",
+            "question_sort_key",
+            "question_number",
+            "id",
+        ),
+        Index("ix_stage_questions_subject_chapter_year", "subject", "chapter", "year"),
+        Index(
+            "ix_stage_questions_unreviewed_id",
+            "id",
+            postgresql_where=reviewed == False,
+        ),
     )
 
     def __repr__(self):
@@ -61,7 +124,9 @@ class StageOption(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Foreign key to parent stage question
-    question_id = Column(Integer, ForeignKey("stage_questions.id"), nullable=False)
+    question_id = Column(
+        Integer, ForeignKey("stage_questions.id"), nullable=False, index=True
+    )
 
     label = Column(String, nullable=True)
     text = Column(Text, nullable=True)
@@ -71,7 +136,89 @@ class StageOption(Base):
     diagram_name = Column(Text)
 
     # Relationship back to stage question
-    question = relationship("StageQuestion", back_populates="options")
+    question = relationship(
+        "StageQuestion", back_populates="options", lazy="raise_on_sql"
+    )
+
+    __table_args__ = (
+        # One option per label, as for options in the bank
+        Index(
+            "uq_stage_options_question_id_label", "question_id", "label", unique=True
+        ),
+    )
 
     def __repr__(self):
         return f"<StageOption {self.label}: {self.text[:50]}...>"
+
+
+class StageQuestionIssue(Base):
+    # A mechanical problem the rule checks found in a staged question
+    # (app.domain.process_questions.checks); replaced whenever the question
+    # is checked again
+    __tablename__ = "stage_question_issues"
+
+    id = Column(Integer, primary_key=True)
+    question_id = Column(
+        Integer,
+        ForeignKey("stage_questions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    rule = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.current_timestamp()
+    )
+
+    # A question's issues, and the flagged/issue search filters (EXISTS
+    # probes per question, or the questions with one rule's issues)
+    __table_args__ = (
+        Index("ix_stage_question_issues_question_id_rule", "question_id", "rule"),
+        Index("ix_stage_question_issues_rule_question_id", "rule", "question_id"),
+    )
+
+    def __repr__(self):
+        return f"<StageQuestionIssue {self.question_id} {self.rule}>"
+
+
+class StageQuestionCheck(Base):
+    # The updated_at a staged question had when it was last checked: the
+    # next run checks only questions whose updated_at differs, or that have
+    # no row here yet
+    __tablename__ = "stage_question_checks"
+
+    question_id = Column(
+        Integer,
+        ForeignKey("stage_questions.id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    checked_updated_at = Column(TIMESTAMP, nullable=False)
+    checked_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.current_timestamp()
+    )
+
+    def __repr__(self):
+        return f"<StageQuestionCheck {self.question_id}>"
+
+
+class StageQuestionClaim(Base):
+    # A reviewer's lease on an unreviewed staged question, handed out by
+    # POST /api/process-questions/claim. Until expires_at no one else is
+    # given the question; after it the row is taken over by the next claim.
+    __tablename__ = "stage_question_claims"
+
+    question_id = Column(
+        Integer,
+        ForeignKey("stage_questions.id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    reviewer = Column(String, nullable=False)
+    claimed_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.current_timestamp()
+    )
+    expires_at = Column(TIMESTAMP, nullable=False)
+
+    def __repr__(self):
+        return f"<StageQuestionClaim {self.question_id} {self.reviewer}>"
@@ -1,31 +1,85 @@
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Optional
 
-from sqlalchemy import Integer, cast, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Select,
+    delete,
+    exists,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, load_only, selectinload
 
-from app.domain.process_questions.models import StageQuestion
+from app.db.facets import count_facets
+from app.db.ordering import number_sort_key
+from app.db.pagination import KeysetPage, keyset_paginate
+from app.db.upsert import upsert_questions
+from app.domain.process_questions import schemas
+from app.domain.subjects.taxonomy import TaxonomyResolver
+from app.domain.process_questions.models import (
+    StageOption,
+    StageQuestion,
+    StageQuestionClaim,
+    StageQuestionIssue,
+)
+
+# Loader options per response shape, as for questions. Search results only
+# show the columns of StageQuestionSearchRead and no options.
+STAGE_QUESTION_LIST_LOAD = (selectinload(StageQuestion.options),)
+STAGE_QUESTION_SEARCH_LOAD = (
+    load_only(
+        StageQuestion.id,
+        StageQuestion.source,
+        StageQuestion.year,
+        StageQuestion.subject,
+        StageQuestion.chapter,
+        StageQuestion.question_number,
+        StageQuestion.reviewed,
+    ),
+)
+STAGE_QUESTION_DETAIL_LOAD = (joinedload(StageQuestion.options),)
+
+STAGE_QUESTION_PAPER_ORDER = (
+    StageQuestion.question_sort_key,
+    StageQuestion.question_number,
+    StageQuestion.id,
+)
 
 
 class StageQuestionRepository:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def list(self) -> list[StageQuestion]:
-        stmt = select(StageQuestion).order_by(StageQuestion.id)
-        return list(self.session.scalars(stmt))
+    async def list(
+        self, *, cursor: Optional[str], limit: int
+    ) -> KeysetPage[StageQuestion]:
+        stmt = select(StageQuestion).options(*STAGE_QUESTION_LIST_LOAD)
+        return await keyset_paginate(
+            self.session, stmt, [StageQuestion.id], cursor=cursor, limit=limit
+        )
 
-    def search(
-        self,
+    @staticmethod
+    def _filter(
+        stmt: Select,
         *,
         year: Optional[str] = None,
         source: Optional[str] = None,
         subject: Optional[str] = None,
         chapter: Optional[str] = None,
         reviewed: Optional[bool] = None,
-    ) -> list[StageQuestion]:
-        stmt = select(StageQuestion)
+        subject_id: Optional[int] = None,
+        chapter_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+        flagged: Optional[bool] = None,
+        issue: Optional[str] = None,
+    ) -> Select:
         if year:
             stmt = stmt.where(StageQuestion.year == year)
         if source:
@@ -36,64 +90,254 @@ class StageQuestionRepository:
             stmt = stmt.where(StageQuestion.chapter == chapter)
         if reviewed is not None:
             stmt = stmt.where(StageQuestion.reviewed == reviewed)
+        if subject_id is not None:
+            stmt = stmt.where(StageQuestion.subject_id == subject_id)
+        if chapter_id is not None:
+            stmt = stmt.where(StageQuestion.chapter_id == chapter_id)
+        if topic_id is not None:
+            stmt = stmt.where(StageQuestion.topic_id == topic_id)
+        # Findings of the rule checks (app.domain.process_questions.checks)
+        if flagged is not None:
+            has_issues = exists().where(
+                StageQuestionIssue.question_id == StageQuestion.id
+            )
+            stmt = stmt.where(has_issues if flagged else ~has_issues)
+        if issue:
+            stmt = stmt.where(
+                exists().where(
+                    StageQuestionIssue.question_id == StageQuestion.id,
+                    StageQuestionIssue.rule == issue,
+                )
+            )
+        return stmt
+
+    async def search(
+        self,
+        *,
+        year: Optional[str] = None,
+        source: Optional[str] = None,
+        subject: Optional[str] = None,
+        chapter: Optional[str] = None,
+        reviewed: Optional[bool] = None,
+        subject_id: Optional[int] = None,
+        chapter_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+        flagged: Optional[bool] = None,
+        issue: Optional[str] = None,
+    ) -> list[StageQuestion]:
+        stmt = self._filter(
+            select(StageQuestion).options(*STAGE_QUESTION_SEARCH_LOAD),
+            year=year,
+            source=source,
+            subject=subject,
+            chapter=chapter,
+            reviewed=reviewed,
+            subject_id=subject_id,
+            chapter_id=chapter_id,
+            topic_id=topic_id,
+            flagged=flagged,
+            issue=issue,
+        )
+        stmt = stmt.order_by(*STAGE_QUESTION_PAPER_ORDER)
+        return list(await self.session.scalars(stmt))
 
-        stmt = stmt.order_by(cast(StageQuestion.question_number, Integer))
-        return list(self.session.scalars(stmt))
+    async def facets(self) -> dict[str, Any]:
+        return await count_facets(
+            self.session,
+            [
+                StageQuestion.source,
+                StageQuestion.year,
+                StageQuestion.subject,
+                StageQuestion.chapter,
+                StageQuestion.topic,
+                StageQuestion.reviewed,
+            ],
+        )
 
-    def get_by_question_number(
+    async def get_by_question_number(
         self, *, year: str, question_number: str
     ) -> Optional[StageQuestion]:
         stmt = (
             select(StageQuestion)
+            .options(*STAGE_QUESTION_DETAIL_LOAD)
             .where(
                 StageQuestion.year == year,
+                StageQuestion.question_sort_key
+                == number_sort_key(literal(question_number)),
                 StageQuestion.question_number == question_number,
             )
             .order_by(StageQuestion.id)
             .limit(1)
         )
-        return self.session.scalars(stmt).first()
+        return (await self.session.scalars(stmt)).unique().first()
 
-    def get(self, question_id: int) -> Optional[StageQuestion]:
-        return self.session.get(StageQuestion, question_id)
+    async def get(self, question_id: int) -> Optional[StageQuestion]:
+        return await self.session.get(
+            StageQuestion, question_id, options=STAGE_QUESTION_DETAIL_LOAD
+        )
 
-    def create(self, question: StageQuestion) -> StageQuestion:
-        self.session.add(question)
-        self.session.commit()
-        self.session.refresh(question)
-        return question
+    async def list_issues(self, question_id: int) -> list[StageQuestionIssue]:
+        stmt = (
+            select(StageQuestionIssue)
+            .where(StageQuestionIssue.question_id == question_id)
+            .order_by(StageQuestionIssue.rule, StageQuestionIssue.id)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def claim(
+        self, *, reviewer: str, n: int, lease: timedelta
+    ) -> tuple[list[StageQuestion], Optional[datetime]]:
+        # Hands the reviewer up to n unreviewed questions no one else holds,
+        # and returns them with the lease expiry. The reviewer's unexpired
+        # claims are renewed first, the lowest n of them (any others are
+        # left to expire), and count towards n; the rest are the lowest free
+        # (or expired) ids. Those are row locked
+        # with SKIP LOCKED, so concurrent claims pass over each other's
+        # instead of waiting, and the upsert takes a claim over only when it
+        # expired (a row claimed after this statement's snapshot is skipped).
+        now = func.current_timestamp()
+        expires_at = now + lease
+        held = aliased(StageQuestionClaim)
+        own = (
+            select(held.question_id)
+            .join(StageQuestion, StageQuestion.id == held.question_id)
+            .where(
+                held.reviewer == reviewer,
+                held.expires_at > now,
+                StageQuestion.reviewed == False,
+            )
+            .order_by(held.question_id)
+            .limit(n)
+        )
+        renew = (
+            update(StageQuestionClaim)
+            .where(
+                StageQuestionClaim.question_id.in_(own),
+                StageQuestionClaim.reviewer == reviewer,
+                StageQuestionClaim.expires_at > now,
+            )
+            .values(expires_at=expires_at)
+            .returning(StageQuestionClaim.question_id, StageQuestionClaim.expires_at)
+        )
+        candidates = (
+            select(StageQuestion.id)
+            .outerjoin(
+                StageQuestionClaim, StageQuestionClaim.question_id == StageQuestion.id
+            )
+            # reviewed == False, as in ix_stage_questions_unreviewed_id
+            .where(
+                StageQuestion.reviewed == False,
+                or_(
+                    StageQuestionClaim.question_id.is_(None),
+                    StageQuestionClaim.expires_at <= now,
+                ),
+            )
+            .order_by(StageQuestion.id)
+            # FOR NO KEY UPDATE: does not block inserts of options or issues
+            # referencing the question
+            .with_for_update(of=StageQuestion, skip_locked=True, key_share=True)
+        )
+        try:
+            claimed = (await self.session.execute(renew)).all()
+            if len(claimed) < n:
+                fresh = candidates.limit(n - len(claimed)).cte("candidates")
+                stmt = insert(StageQuestionClaim).from_select(
+                    ["question_id", "reviewer", "expires_at"],
+                    select(fresh.c.id, literal(reviewer), expires_at),
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[StageQuestionClaim.question_id],
+                    set_={
+                        "reviewer": stmt.excluded.reviewer,
+                        "claimed_at": now,
+                        "expires_at": stmt.excluded.expires_at,
+                    },
+                    where=StageQuestionClaim.expires_at <= now,
+                ).returning(
+                    StageQuestionClaim.question_id, StageQuestionClaim.expires_at
+                )
+                claimed.extend(await self.session.execute(stmt))
+            stmt = (
+                select(StageQuestion)
+                .options(*STAGE_QUESTION_LIST_LOAD)
+                .where(StageQuestion.id.in_([row.question_id for row in claimed]))
+                .order_by(StageQuestion.id)
+            )
+            questions = list(await self.session.scalars(stmt))
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        # Same for every row: now() is the transaction's start time
+        return questions, claimed[0].expires_at if claimed else None
 
-    def update(self, question: StageQuestion, **fields) -> StageQuestion:
+    async def bulk_create(
+        self, payloads: list[schemas.StageQuestionCreate], taxonomy: TaxonomyResolver
+    ) -> list[int]:
+        # Upserts by natural key, so posting a paper again updates its
+        # questions instead of duplicating them; returns the ids in order
+        items = [
+            (
+                {
+                    **payload.model_dump(exclude={"options"}),
+                    **taxonomy.resolve(payload.subject, payload.chapter, payload.topic),
+                },
+                [option.model_dump() for option in payload.options],
+            )
+            for payload in payloads
+        ]
+        try:
+            ids = await upsert_questions(
+                self.session, StageQuestion, StageOption, items
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return ids
+
+    async def update(self, question: StageQuestion, **fields) -> StageQuestion:
         for key, value in fields.items():
             if value is not None:
                 setattr(question, key, value)
+        if any(self.session.is_modified(option) for option in question.options):
+            # As for questions: option edits alone must still bump the row,
+            # so the rule checks look at it again
+            question.updated_at = func.current_timestamp()
+        if fields.get("reviewed"):
+            # Done: the reviewer's claim on it is released
+            await self.session.execute(
+                delete(StageQuestionClaim).where(
+                    StageQuestionClaim.question_id == question.id
+                )
+            )
 
         self.session.add(question)
-        self.session.commit()
-        self.session.refresh(question)
+        await self.session.commit()
+        await self.session.refresh(question, ["updated_at", "options"])
         return question
 
-    def delete(self, question: StageQuestion) -> None:
-        self.session.delete(question)
-        self.session.commit()
+    async def delete(self, question: StageQuestion) -> None:
+        await self.session.delete(question)
+        await self.session.commit()
 
-    def get_distinct_sources(self) -> list[str]:
+    async def get_distinct_sources(self) -> list[str]:
         stmt = (
             select(StageQuestion.source)
             .distinct()
             .where(StageQuestion.source.is_not(None))
         )
-        return list(self.session.scalars(stmt))
+        return list(await self.session.scalars(stmt))
 
-    def get_distinct_subjects(self) -> list[str]:
+    async def get_distinct_subjects(self) -> list[str]:
         stmt = (
             select(StageQuestion.subject)
             .distinct()
             .where(StageQuestion.subject.is_not(None))
         )
-        return list(self.session.scalars(stmt))
+        return list(await self.session.scalars(stmt))
 
-    def get_distinct_chapters(self, subject: Optional[str] = None) -> list[str]:
+    async def get_distinct_chapters(self, subject: Optional[str] = None) -> list[str]:
         stmt = (
             select(StageQuestion.chapter)
             .distinct()
@@ -101,10 +345,10 @@ class StageQuestionRepository:
         )
         if subject:
             stmt = stmt.where(StageQuestion.subject == subject)
-        return list(self.session.scalars(stmt))
+        return list(await self.session.scalars(stmt))
 
-    def get_distinct_years(self) -> list[str]:
+    async def get_distinct_years(self) -> list[str]:
         stmt = (
             select(StageQuestion.year).distinct().where(StageQuestion.year.is_not(None))
         )
-        return list(self.session.scalars(stmt))
+        return list(await self.session.scalars(stmt))
@@ -1,75 +1,128 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from typing import Any
 
-from app.dependencies import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.serialization import ORMSerializer
+from app.dependencies import PageParams, get_db
 from app.domain.process_questions import schemas
 from app.domain.process_questions.services import StageQuestionService
+from app.interfaces.api.bulk import bulk_create
+from app.interfaces.api.schemas import BulkResult, Page
 
 router = APIRouter(prefix="/process-questions", tags=["process-questions"])
 
+stage_question_serializer = ORMSerializer(schemas.StageQuestionRead)
+
 
-def get_stage_question_service(db: Session = Depends(get_db)) -> StageQuestionService:
+def get_stage_question_service(
+    db: AsyncSession = Depends(get_db),
+) -> StageQuestionService:
     return StageQuestionService(db)
 
 
-@router.get("/", response_model=list[schemas.StageQuestionRead])
-def list_questions(service: StageQuestionService = Depends(get_stage_question_service)):
-    return service.list_questions()
+@router.get("/", response_model=Page[schemas.StageQuestionRead])
+async def list_questions(
+    page: PageParams = Depends(),
+    service: StageQuestionService = Depends(get_stage_question_service),
+):
+    return stage_question_serializer.page_response(
+        await service.list_questions(cursor=page.cursor, limit=page.limit)
+    )
 
 
 @router.get("/search", response_model=list[schemas.StageQuestionSearchRead])
-def search_questions(
+async def search_questions(
     year: str | None = Query(None),
     source: str | None = Query(None),
     subject: str | None = Query(None),
     chapter: str | None = Query(None),
     reviewed: bool | None = Query(None),
+    subject_id: int | None = Query(None),
+    chapter_id: int | None = Query(None),
+    topic_id: int | None = Query(None),
+    flagged: bool | None = Query(
+        None, description="Only questions the rule checks did (true) or did not flag"
+    ),
+    issue: str | None = Query(
+        None,
+        description="Only questions flagged by this rule, e.g. answer_not_in_options",
+    ),
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
     print(year, source, subject, chapter, reviewed)
-    return service.search_questions(
-        year=year, source=source, subject=subject, chapter=chapter, reviewed=reviewed
+    return await service.search_questions(
+        year=year,
+        source=source,
+        subject=subject,
+        chapter=chapter,
+        reviewed=reviewed,
+        subject_id=subject_id,
+        chapter_id=chapter_id,
+        topic_id=topic_id,
+        flagged=flagged,
+        issue=issue,
     )
 
 
+@router.post("/claim", response_model=schemas.StageQuestionClaimRead)
+async def claim_questions(
+    reviewer: str = Query(..., min_length=1, max_length=255),
+    n: int = Query(10, ge=1, le=settings.REVIEW_CLAIM_MAX),
+    service: StageQuestionService = Depends(get_stage_question_service),
+):
+    # Each reviewer gets a disjoint batch of unreviewed questions; claim
+    # again for more once these are reviewed, or to keep them past the lease
+    return await service.claim_questions(reviewer=reviewer, n=n)
+
+
+@router.get("/facets", response_model=schemas.StageQuestionFacets)
+async def get_question_facets(
+    service: StageQuestionService = Depends(get_stage_question_service),
+):
+    return await service.get_facets()
+
+
 @router.get("/sources", response_model=list[str])
-def get_unique_sources(
+async def get_unique_sources(
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    return service.get_unique_sources()
+    return await service.get_unique_sources()
 
 
 @router.get("/subjects", response_model=list[str])
-def get_unique_subjects(
+async def get_unique_subjects(
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    return service.get_unique_subjects()
+    return await service.get_unique_subjects()
 
 
 @router.get("/chapters", response_model=list[str])
-def get_unique_chapters(
+async def get_unique_chapters(
     subject: str | None = Query(None),
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    return service.get_unique_chapters(subject=subject)
+    return await service.get_unique_chapters(subject=subject)
 
 
 @router.get("/years", response_model=list[str])
-def get_unique_years(
+async def get_unique_years(
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    return service.get_unique_years()
+    return await service.get_unique_years()
 
 
 @router.get(
     "/by-question-number/{question_number}", response_model=schemas.StageQuestionRead
 )
-def get_question_by_question_number(
+async def get_question_by_question_number(
     question_number: str,
     year: str = Query(...),
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    question = service.get_question_by_question_number(
+    question = await service.get_question_by_question_number(
         year=year, question_number=question_number
     )
     if not question:
@@ -80,11 +133,11 @@ def get_question_by_question_number(
 
 
 @router.get("/{question_id}", response_model=schemas.StageQuestionRead)
-def get_question(
+async def get_question(
     question_id: int,
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="StageQuestion not found"
@@ -92,38 +145,78 @@ def get_question(
     return question
 
 
+@router.get(
+    "/{question_id}/issues", response_model=list[schemas.StageQuestionIssueRead]
+)
+async def get_question_issues(
+    question_id: int,
+    service: StageQuestionService = Depends(get_stage_question_service),
+):
+    question = await service.get_question(question_id)
+    if not question:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="StageQuestion not found"
+        )
+    return await service.list_issues(question_id)
+
+
 @router.post(
     "/", response_model=schemas.StageQuestionRead, status_code=status.HTTP_201_CREATED
 )
-def create_question(
+async def create_question(
     payload: schemas.StageQuestionCreate,
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    return service.create_question(payload)
+    return await service.create_question(payload)
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_questions(
+    items: list[dict[str, Any]] = Body(
+        ...,
+        max_length=settings.BULK_MAX_ITEMS,
+        description="StageQuestionCreate objects; each is validated and reported separately",
+    ),
+    service: StageQuestionService = Depends(get_stage_question_service),
+):
+    return await bulk_create(
+        items,
+        schemas.StageQuestionCreate,
+        service.bulk_create_questions,
+        chunk_size=settings.BULK_CHUNK_SIZE,
+    )
 
 
 @router.patch("/{question_id}", response_model=schemas.StageQuestionRead)
-def update_question(
+async def update_question(
     question_id: int,
     payload: schemas.StageQuestionUpdate,
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="StageQuestion not found"
         )
-    return service.update_question(question, payload)
+    try:
+        return await service.update_question(question, payload)
+    except IntegrityError:
+        # The natural key unique index, or the one on option labels
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another question has the same source, year and question "
+            "number, or two options have the same label",
+        )
 
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_question(
+async def delete_question(
     question_id: int,
     service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="StageQuestion not found"
         )
-    service.delete_question(question)
+    await service.delete_question(question)
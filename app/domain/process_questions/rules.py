@@ -0,0 +1,106 @@
+import re
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from app.domain.diagrams.storage import normalize_diagram_name
+
+# Runs in the check process pool (app.domain.process_questions.checks):
+# plain functions over plain rows, no database access
+
+# NEET questions have four options
+EXPECTED_OPTIONS = 4
+# "(2)", "2)", "[B]", "b." and "B" are the same label
+_LABEL_DECORATION = re.compile(r"^[\s(\[]+|[\s)\].:]+$")
+# Placeholders the question JSON uses for "no value"
+_EMPTY = {"", "none", "null", "n/a"}
+
+
+class OptionRow(NamedTuple):
+    label: Optional[str]
+    text: Optional[str]
+    has_diagram: Optional[bool]
+    diagram_name: Optional[str]
+
+
+class QuestionRow(NamedTuple):
+    id: int
+    answer: Optional[str]
+    ai_answer: Optional[str]
+    has_diagram: Optional[bool]
+    diagram_name: Optional[str]
+    options: list[OptionRow]
+
+
+class Issue(NamedTuple):
+    question_id: int
+    rule: str
+    message: str
+
+
+def _value(value: Optional[str]) -> Optional[str]:
+    if value is None or value.strip().lower() in _EMPTY:
+        return None
+    return value.strip()
+
+
+def label_key(value: Optional[str]) -> Optional[str]:
+    value = _value(value)
+    if value is None:
+        return None
+    return _LABEL_DECORATION.sub("", value).casefold() or None
+
+
+def answer_not_in_options(question: QuestionRow) -> Iterator[str]:
+    answer = _value(question.answer)
+    if answer is None:
+        yield "answer is empty"
+        return
+    labels = {label_key(option.label) for option in question.options}
+    if label_key(answer) not in labels:
+        yield f"answer {answer!r} matches no option label"
+
+
+def diagram_name_missing(question: QuestionRow) -> Iterator[str]:
+    if question.has_diagram and normalize_diagram_name(question.diagram_name) is None:
+        yield "has_diagram is true but diagram_name is empty"
+    for option in question.options:
+        if option.has_diagram and normalize_diagram_name(option.diagram_name) is None:
+            yield (f"option {option.label!r} has has_diagram true but no diagram_name")
+
+
+def missing_option(question: QuestionRow) -> Iterator[str]:
+    if len(question.options) < EXPECTED_OPTIONS:
+        yield f"{len(question.options)} options, expected {EXPECTED_OPTIONS}"
+    for option in question.options:
+        if label_key(option.label) is None:
+            yield "an option has no label"
+        elif _value(option.text) is None and not option.has_diagram:
+            yield f"option {option.label!r} has no text"
+
+
+def ai_answer_mismatch(question: QuestionRow) -> Iterator[str]:
+    answer = label_key(question.answer)
+    ai_answer = label_key(question.ai_answer)
+    if answer is not None and ai_answer is not None and answer != ai_answer:
+        yield (
+            f"ai_answer {question.ai_answer.strip()!r} differs from "
+            f"answer {question.answer.strip()!r}"
+        )
+
+
+# Rule name -> check yielding one message per problem; the names are stored
+# in stage_question_issues.rule and filtered on with ?issue=
+RULES: dict[str, Callable[[QuestionRow], Iterator[str]]] = {
+    "answer_not_in_options": answer_not_in_options,
+    "diagram_name_missing": diagram_name_missing,
+    "missing_option": missing_option,
+    "ai_answer_mismatch": ai_answer_mismatch,
+}
+
+
+def check_questions(questions: list[QuestionRow]) -> list[Issue]:
+    return [
+        Issue(question.id, rule, message)
+        for question in questions
+        for rule, check in RULES.items()
+        for message in check(question)
+    ]
@@ -3,6 +3,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from app.interfaces.api.schemas import FacetCount
+
 
 # --- Stage Option Schemas ---
 
@@ -101,6 +103,38 @@ class StageQuestionRead(StageQuestionBase):
     created_at: datetime
     updated_at: datetime
     ai_answer: Optional[str] = None
+    subject_id: Optional[int] = None
+    chapter_id: Optional[int] = None
+    topic_id: Optional[int] = None
+    promoted_question_id: Optional[int] = None
     options: list[StageOptionRead] = []
 
     model_config = {"from_attributes": True}
+
+
+class StageQuestionIssueRead(BaseModel):
+    # A finding of the rule checks (app.domain.process_questions.rules)
+    rule: str
+    message: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class StageQuestionClaimRead(BaseModel):
+    # The questions the reviewer holds until expires_at (None: nothing left
+    # to claim); claiming again before then renews the lease
+    reviewer: str
+    expires_at: Optional[datetime]
+    questions: list[StageQuestionRead]
+
+
+class StageQuestionFacets(BaseModel):
+    # Counts per value of each filter column, for the filter sidebar
+    total: int
+    source: list[FacetCount]
+    year: list[FacetCount]
+    subject: list[FacetCount]
+    chapter: list[FacetCount]
+    topic: list[FacetCount]
+    reviewed: list[FacetCount]
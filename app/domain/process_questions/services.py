@@ -1,78 +1,99 @@
-from sqlalchemy.orm import Session
+from datetime import timedelta
+from typing import Any
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.pagination import KeysetPage
+from app.db.table_cache import TableCache
 from app.domain.process_questions import schemas
-from app.domain.process_questions.models import StageOption, StageQuestion
+from app.domain.process_questions.models import StageQuestion, StageQuestionIssue
 from app.domain.process_questions.repository import StageQuestionRepository
+from app.domain.subjects.taxonomy import get_taxonomy
+
+facets_cache = TableCache(StageQuestion.__tablename__, ttl=settings.FACETS_CACHE_TTL)
 
 
 class StageQuestionService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
         self.repo = StageQuestionRepository(session)
 
-    def list_questions(self) -> list[StageQuestion]:
-        return self.repo.list()
+    async def list_questions(
+        self, *, cursor: str | None, limit: int
+    ) -> KeysetPage[StageQuestion]:
+        return await self.repo.list(cursor=cursor, limit=limit)
 
-    def search_questions(
+    async def search_questions(
         self,
         year: str | None = None,
         source: str | None = None,
         subject: str | None = None,
         chapter: str | None = None,
         reviewed: bool | None = None,
+        subject_id: int | None = None,
+        chapter_id: int | None = None,
+        topic_id: int | None = None,
+        flagged: bool | None = None,
+        issue: str | None = None,
     ) -> list[StageQuestion]:
-        return self.repo.search(
+        return await self.repo.search(
             year=year,
             source=source,
             subject=subject,
             chapter=chapter,
             reviewed=reviewed,
+            subject_id=subject_id,
+            chapter_id=chapter_id,
+            topic_id=topic_id,
+            flagged=flagged,
+            issue=issue,
         )
 
-    def get_question_by_question_number(
+    async def get_facets(self) -> dict[str, Any]:
+        return await facets_cache.get_or_load(self.repo.facets)
+
+    async def get_question_by_question_number(
         self, *, year: str, question_number: str
     ) -> StageQuestion | None:
-        return self.repo.get_by_question_number(
+        return await self.repo.get_by_question_number(
             year=year, question_number=question_number
         )
 
-    def get_question(self, question_id: int) -> StageQuestion | None:
-        return self.repo.get(question_id)
-
-    def create_question(self, payload: schemas.StageQuestionCreate) -> StageQuestion:
-        # Create StageQuestion instance
-        question = StageQuestion(
-            source=payload.source,
-            year=payload.year,
-            subject=payload.subject,
-            chapter=payload.chapter,
-            topic=payload.topic,
-            question_number=payload.question_number,
-            question_text=payload.question_text,
-            difficulty=payload.difficulty,
-            has_diagram=payload.has_diagram,
-            diagram_description=payload.diagram_description,
-            diagram_position=payload.diagram_position,
-            diagram_name=payload.diagram_name,
-            answer=payload.answer,
-            ai_answer=payload.ai_answer,
-            solution=payload.solution,
-            reviewed=payload.reviewed,
+    async def get_question(self, question_id: int) -> StageQuestion | None:
+        return await self.repo.get(question_id)
+
+    async def list_issues(self, question_id: int) -> list[StageQuestionIssue]:
+        return await self.repo.list_issues(question_id)
+
+    async def claim_questions(
+        self, *, reviewer: str, n: int
+    ) -> schemas.StageQuestionClaimRead:
+        questions, expires_at = await self.repo.claim(
+            reviewer=reviewer,
+            n=n,
+            lease=timedelta(seconds=settings.REVIEW_CLAIM_LEASE_SECONDS),
+        )
+        return schemas.StageQuestionClaimRead(
+            reviewer=reviewer, expires_at=expires_at, questions=questions
         )
 
-        # Create StageOption instances and associate them
-        for opt_payload in payload.options:
-            option = StageOption(
-                label=opt_payload.label,
-                text=opt_payload.text,
-                has_diagram=opt_payload.has_diagram,
-                diagram_description=opt_payload.diagram_description,
-                diagram_name=opt_payload.diagram_name,
-            )
-            question.options.append(option)
+    async def bulk_create_questions(
+        self, payloads: list[schemas.StageQuestionCreate]
+    ) -> list[int]:
+        taxonomy = await get_taxonomy(self.session)
+        return await self.repo.bulk_create(payloads, taxonomy)
 
-        return self.repo.create(question)
+    async def create_question(
+        self, payload: schemas.StageQuestionCreate
+    ) -> StageQuestion:
+        # Same upsert as the bulk path: posting a question that exists (same
+        # source, year and question number) updates it
+        taxonomy = await get_taxonomy(self.session)
+        [question_id] = await self.repo.bulk_create([payload], taxonomy)
+        return await self.repo.get(question_id)
 
-    def update_question(
+    async def update_question(
         self, question: StageQuestion, payload: schemas.StageQuestionUpdate
     ) -> StageQuestion:
         fields: dict[str, object] = {}
@@ -122,19 +143,31 @@ class StageQuestionService:
                         question.options[index].diagram_name = opt_payload.diagram_name
                         break
 
-        return self.repo.update(question, **fields)
+        if fields.keys() & {"subject", "chapter", "topic"}:
+            taxonomy = await get_taxonomy(self.session)
+            ids = taxonomy.resolve(
+                fields.get("subject", question.subject),
+                fields.get("chapter", question.chapter),
+                fields.get("topic", question.topic),
+            )
+            # Set directly: repo.update skips None, and a name that no
+            # longer resolves has to clear the old id
+            for key, value in ids.items():
+                setattr(question, key, value)
+
+        return await self.repo.update(question, **fields)
 
-    def delete_question(self, question: StageQuestion) -> None:
-        self.repo.delete(question)
+    async def delete_question(self, question: StageQuestion) -> None:
+        await self.repo.delete(question)
 
-    def get_unique_sources(self) -> list[str]:
-        return self.repo.get_distinct_sources()
+    async def get_unique_sources(self) -> list[str]:
+        return await self.repo.get_distinct_sources()
 
-    def get_unique_subjects(self) -> list[str]:
-        return self.repo.get_distinct_subjects()
+    async def get_unique_subjects(self) -> list[str]:
+        return await self.repo.get_distinct_subjects()
 
-    def get_unique_chapters(self, subject: str | None = None) -> list[str]:
-        return self.repo.get_distinct_chapters(subject=subject)
+    async def get_unique_chapters(self, subject: str | None = None) -> list[str]:
+        return await self.repo.get_distinct_chapters(subject=subject)
 
-    def get_unique_years(self) -> list[str]:
-        return self.repo.get_distinct_years()
+    async def get_unique_years(self) -> list[str]:
+        return await self.repo.get_distinct_years()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic_core import to_json
+
+from app.core.config import settings
+from app.core.serialization import ORMSerializer
+from app.db.query_stats import expect_repeated_queries
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.domain.questions import schemas
+from app.domain.questions.models import Question
+from app.domain.questions.services import QuestionService
+from app.utils.file_lock import try_lock
+
+logger = logging.getLogger(__name__)
+
+# Offline bundles: one gzipped JSON array of questions (QuestionRead) per
+# subject and year, named by the SHA-256 of the file, listed in MANIFEST.
+# Same rows give the same bytes, so a name never changes meaning and every
+# server building from one database serves the same files.
+MANIFEST = "manifest.json"
+BUNDLE_NAME = re.compile(r"^[0-9a-f]{64}\.json\.gz$")
+BUNDLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+serializer = ORMSerializer(schemas.QuestionRead)
+
+
+def _group_key(subject: Optional[str], year: Optional[str]) -> tuple[str, str]:
+    return subject or "", year or ""
+
+
+def _encode_bundle(questions: list[Question]) -> tuple[bytes, str]:
+    # Runs in a worker thread, serialization included: it is most of the
+    # work, and the periodic rebuild shares the event loop with requests.
+    # The questions are fully loaded, so nothing here touches the session.
+    rows = []
+    for question in questions:
+        item = serializer.to_dict(question)
+        # Options have no defined load order; sort so the bytes are stable
+        item["options"].sort(key=lambda option: option["id"])
+        rows.append(item)
+    # mtime=0 keeps the gzip header, and so the name, stable across builds
+    data = gzip.compress(to_json(rows), compresslevel=9, mtime=0)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Readers see the old file or the new one, never a partial write
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def read_manifest(directory: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads((directory / MANIFEST).read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+async def build_bundles(service: QuestionService, directory: Path) -> dict[str, int]:
+    # Rebuilds only the groups whose fingerprint differs from the current
+    # manifest, then drops files referenced by neither the new manifest nor
+    # the one before it (clients that just read the old manifest can still
+    # fetch what it lists)
+    previous = read_manifest(directory) or {"bundles": []}
+    current = {
+        _group_key(entry["subject"], entry["year"]): entry
+        for entry in previous["bundles"]
+    }
+    groups = await service.get_bundle_fingerprints()
+
+    expect_repeated_queries()
+    bundles = []
+    built = 0
+    for group in groups:
+        entry = current.get(_group_key(group.subject, group.year))
+        if (
+            entry is not None
+            and entry["fingerprint"] == group.fingerprint
+            and (directory / entry["file"]).exists()
+        ):
+            bundles.append(entry)
+            continue
+
+        questions = await service.get_questions_for_bundle(
+            subject=group.subject, year=group.year
+        )
+        data, digest = await asyncio.to_thread(_encode_bundle, questions)
+        # Serialized: drop the instances so memory stays at one group
+        del questions
+        service.session.expunge_all()
+
+        name = f"{digest}.json.gz"
+        if not (directory / name).exists():
+            await asyncio.to_thread(_write_atomic, directory / name, data)
+        bundles.append(
+            {
+                "subject": group.subject,
+                "year": group.year,
+                "questions": group.questions,
+                "fingerprint": group.fingerprint,
+                "file": name,
+                "size": len(data),
+            }
+        )
+        built += 1
+
+    bundles.sort(key=lambda entry: _group_key(entry["subject"], entry["year"]))
+    removed = current.keys() - {
+        _group_key(entry["subject"], entry["year"]) for entry in bundles
+    }
+    if bundles != previous["bundles"]:
+        manifest = {
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "bundles": bundles,
+        }
+        _write_atomic(directory / MANIFEST, to_json(manifest, indent=2))
+
+    keep = {entry["file"] for entry in bundles + previous["bundles"]}
+    for path in directory.iterdir():
+        if BUNDLE_NAME.match(path.name) and path.name not in keep:
+            path.unlink(missing_ok=True)
+
+    return {
+        "bundles": len(bundles),
+        "built": built,
+        "unchanged": len(bundles) - built,
+        "removed": len(removed),
+    }
+
+
+async def rebuild_bundles(directory: Path) -> Optional[dict[str, int]]:
+    # Every gunicorn worker runs the periodic rebuild; the lock file lets one
+    # of them build per directory at a time. Returns None when another
+    # process holds it.
+    directory.mkdir(parents=True, exist_ok=True)
+    with try_lock(directory / ".lock") as locked:
+        if not locked:
+            return None
+        async with AsyncSessionLocal() as session:
+            return await build_bundles(QuestionService(session), directory)
+
+
+async def rebuild_periodically(directory: Path, interval: float) -> None:
+    while True:
+        try:
+            stats = await rebuild_bundles(directory)
+        except Exception:
+            logger.exception("Offline bundle rebuild failed")
+        else:
+            if stats and stats["built"]:
+                logger.info("Offline bundles rebuilt: %s", stats)
+        await asyncio.sleep(interval)
+
+
+async def main() -> None:
+    # python -m app.domain.questions.bundles --output bundles
+    parser = argparse.ArgumentParser(
+        description="Build the offline question bundles, one per subject and year"
+    )
+    parser.add_argument("--output", "-o", default=settings.BUNDLE_DIR)
+    args = parser.parse_args()
+
+    try:
+        stats = await rebuild_bundles(Path(args.output))
+    finally:
+        await dispose_engines()
+    if stats is None:
+        raise SystemExit(f"{args.output} is being built by another process")
+    print(
+        f"{stats['bundles']} bundles: {stats['built']} built, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import csv
+import io
+import sys
+from typing import AsyncIterator, Literal
+
+from pydantic_core import to_json, to_jsonable_python
+
+from app.core.config import settings
+from app.core.serialization import ORMSerializer
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.domain.questions import schemas
+from app.domain.questions.models import Question
+from app.domain.questions.services import QuestionService
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+serializer = ORMSerializer(schemas.QuestionRead)
+
+# One row per question; the options column holds the options as a JSON array
+CSV_COLUMNS = [
+    "id",
+    *(name for name in schemas.QuestionRead.model_fields if name != "id"),
+]
+
+
+def _ndjson_chunk(rows: list[Question]) -> bytes:
+    return b"".join(to_json(serializer.to_dict(row)) + b"\n" for row in rows)
+
+
+def _csv_chunk(rows: list[Question], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        item = serializer.to_dict(row)
+        item["options"] = to_json(item["options"]).decode()
+        writer.writerow(to_jsonable_python(item[column]) for column in CSV_COLUMNS)
+    return buffer.getvalue().encode()
+
+
+async def export_questions(
+    service: QuestionService, fmt: ExportFormat, **filters
+) -> AsyncIterator[bytes]:
+    # One encoded chunk per database fetch, so memory stays at one chunk of
+    # rows however large the export is
+    if fmt == "csv":
+        # Header first so clients see bytes before the first fetch completes
+        yield _csv_chunk([], header=True)
+
+    chunks = service.stream_questions(chunk_size=settings.EXPORT_CHUNK_SIZE, **filters)
+    async for rows in chunks:
+        if fmt == "csv":
+            yield _csv_chunk(rows, header=False)
+        else:
+            yield _ndjson_chunk(rows)
+
+
+async def main() -> None:
+    # python -m app.domain.questions.export --format csv --year 2024 > out.csv
+    parser = argparse.ArgumentParser(description="Export the question bank")
+    parser.add_argument("--format", choices=list(MEDIA_TYPES), default="ndjson")
+    parser.add_argument("--output", "-o", help="file to write, default stdout")
+    parser.add_argument("--year")
+    parser.add_argument("--source")
+    parser.add_argument("--subject")
+    parser.add_argument("--chapter")
+    parser.add_argument(
+        "--reviewed", choices=["true", "false"], help="only (un)reviewed questions"
+    )
+    args = parser.parse_args()
+
+    filters = dict(
+        year=args.year,
+        source=args.source,
+        subject=args.subject,
+        chapter=args.chapter,
+        reviewed=None if args.reviewed is None else args.reviewed == "true",
+    )
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async with AsyncSessionLocal() as session:
+            service = QuestionService(session)
+            async for chunk in export_questions(service, args.format, **filters):
+                output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
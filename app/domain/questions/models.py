@@ -1,7 +1,9 @@
 from sqlalchemy import (
     Boolean,
     Column,
+    Computed,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -12,6 +14,7 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 
 from app.db.base import Base
+from app.db.ordering import number_sort_key
 
 
 class Question(Base):
@@ -20,12 +23,28 @@ class Question(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Main fields from the root JSON
-    source = Column(String, nullable=True, index=True)
-    year = Column(String, nullable=True, index=True)
-    subject = Column(String, nullable=True, index=True)
+    source = Column(String, nullable=True)
+    year = Column(String, nullable=True)
+    subject = Column(String, nullable=True)
     chapter = Column(String, nullable=True, index=True)
     topic = Column(String, nullable=True, index=True)
+    # Taxonomy ids resolved from the names above on write (and by the
+    # app.domain.subjects.taxonomy backfill); joins and id filters use these,
+    # the names are kept for display
+    subject_id = Column(
+        Integer, ForeignKey("subjects.id", ondelete="SET NULL"), index=True
+    )
+    chapter_id = Column(
+        Integer, ForeignKey("chapters.id", ondelete="SET NULL"), index=True
+    )
+    topic_id = Column(Integer, ForeignKey("topics.id", ondelete="SET NULL"), index=True)
     question_number = Column(String, nullable=False, index=True)
+    # Paper order: filled in by Postgres from question_number on every write
+    question_sort_key = Column(
+        Integer,
+        Computed(number_sort_key(question_number), persisted=True),
+        nullable=False,
+    )
     question_text = Column(Text, nullable=True)
     difficulty = Column(String, nullable=True)
     has_diagram = Column(Boolean, default=False)
@@ -58,9 +77,54 @@ class Question(Base):
         onupdate=func.current_timestamp(),
     )
 
-    # Relationship to options
+    # Relationship to options. Never lazy loaded: repositories pick the
+    # loader for each query, and a forgotten one fails instead of running
+    # one query per question
     options = relationship(
-        "Option", back_populates="question", cascade="all, delete-orphan"
+        "Option",
+        back_populates="question",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+    )
+
+    # Paper-order listings and question number lookups within a year, or a
+    # source and year, are range scans on the first two; the rest serve the
+    # other search filter combinations (scripts/bench_search_indexes.py)
+    __table_args__ = (
+        # Natural key: ingesting a question again updates it (app.db.upsert)
+        Index(
+            "uq_questions_source_year_question_number",
+            "source",
+            "year",
+            "question_number",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_questions_year_question_sort_key",
+            "year",
+            "question_sort_key",
+            "question_number",
+            "id",
+        ),
+        Index(
+            "ix_questions_source_year_question_sort_key",
+            "source",
+            "year",
+            "question_sort_key",
+            "question_number",
+            "id",
+        ),
+        Index("ix_questions_subject_chapter_year", "subject", "chapter", "year"),
+        # Delta sync: rows changed after a watermark, in (updated_at, id) order
+        Index("ix_questions_updated_at_id", "updated_at", "id"),
+        # Review queue: the few questions still unreviewed, by chapter
+        Index(
+            "ix_questions_unreviewed_subject_chapter",
+            "subject",
+            "chapter",
+            postgresql_where=reviewed == False,
+        ),
     )
 
     def __repr__(self):
@@ -73,7 +137,9 @@ class Option(Base):
     id = Column(Integer, primary_key=True, index=True)
 
     # Foreign key to parent question
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id = Column(
+        Integer, ForeignKey("questions.id"), nullable=False, index=True
+    )
 
     label = Column(String, nullable=True)
     text = Column(Text, nullable=True)
@@ -89,7 +155,33 @@ class Option(Base):
     )
 
     # Relationship back to question
-    question = relationship("Question", back_populates="options")
+    question = relationship("Question", back_populates="options", lazy="raise_on_sql")
+
+    __table_args__ = (
+        # One option per label: ingesting a question again updates its
+        # options in place, keeping their ids (app.db.upsert). Options
+        # without a label are not matched (NULLs are distinct here).
+        Index("uq_options_question_id_label", "question_id", "label", unique=True),
+    )
 
     def __repr__(self):
         return f"<Option {self.label}: {self.text[:50]}...>"
+
+
+class QuestionTombstone(Base):
+    # One row per deleted question, so delta sync clients can drop it
+    __tablename__ = "question_tombstones"
+
+    question_id = Column(Integer, primary_key=True, autoincrement=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP, server_default=func.current_timestamp()
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_question_tombstones_deleted_at_question_id", "deleted_at", "question_id"
+        ),
+    )
+
+    def __repr__(self):
+        return f"<QuestionTombstone {self.question_id}>"
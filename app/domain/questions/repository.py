@@ -1,39 +1,116 @@
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Optional
 
-from sqlalchemy import Integer, cast, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    TIMESTAMP,
+    Select,
+    cast,
+    delete,
+    func,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.domain.questions.models import Question
+from app.db.facets import count_facets
+from app.db.ordering import number_sort_key
+from app.db.pagination import (
+    ChangeSet,
+    KeysetPage,
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+)
+from app.db.query_stats import expect_repeated_queries
+from app.db.table_cache import record_written_tables
+from app.db.upsert import QUESTION_COLUMNS, copy_questions, upsert_questions
+from app.domain.process_questions.models import StageOption, StageQuestion
+from app.domain.process_questions.repository import StageQuestionRepository
+from app.domain.questions import schemas
+from app.domain.subjects.taxonomy import TaxonomyResolver
+from app.domain.questions.models import Option, Question, QuestionTombstone
+
+# Loader options per response shape. Many rows: options come from one extra
+# IN query for the whole page (a join would repeat every question per
+# option). A single row: options are joined into the same round trip.
+QUESTION_LIST_LOAD = (selectinload(Question.options),)
+QUESTION_SEARCH_LOAD = (
+    load_only(
+        Question.id,
+        Question.source,
+        Question.year,
+        Question.subject,
+        Question.chapter,
+        Question.topic,
+        Question.question_number,
+        Question.question_text,
+        Question.reviewed,
+        Question.answer,
+        Question.ai_answer,
+        Question.solution,
+    ),
+    selectinload(Question.options),
+)
+QUESTION_DETAIL_LOAD = (joinedload(Question.options),)
+
+# Order of the questions in their paper ("12" < "12a" < "13"), the trailing
+# columns of the year and source/year indexes
+QUESTION_PAPER_ORDER = (
+    Question.question_sort_key,
+    Question.question_number,
+    Question.id,
+)
+
+# Delta sync watermark: how far a client has read the changed questions and
+# the tombstones, each on the index it is scanned in
+QUESTION_SYNC_WATERMARK = (
+    Question.updated_at,
+    Question.id,
+    QuestionTombstone.deleted_at,
+    QuestionTombstone.question_id,
+)
+_SYNC_ORIGIN = (datetime.min, 0, datetime.min, 0)
 
 
 class QuestionRepository:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def list(self) -> list[Question]:
-        stmt = select(Question).order_by(Question.id)
-        return list(self.session.scalars(stmt))
+    async def list(self, *, cursor: Optional[str], limit: int) -> KeysetPage[Question]:
+        stmt = select(Question).options(*QUESTION_LIST_LOAD)
+        return await keyset_paginate(
+            self.session, stmt, [Question.id], cursor=cursor, limit=limit
+        )
 
-    def list_by_year(self, year: str) -> list[Question]:
+    async def list_by_year(self, year: str) -> list[Question]:
         stmt = (
             select(Question)
+            .options(*QUESTION_LIST_LOAD)
             .where(Question.year == year)
-            .order_by(cast(Question.question_number, Integer))
+            .order_by(*QUESTION_PAPER_ORDER)
         )
-        return list(self.session.scalars(stmt))
+        return list(await self.session.scalars(stmt))
 
-    def search(
-        self,
+    @staticmethod
+    def _filter(
+        stmt: Select,
         *,
         year: Optional[str] = None,
         source: Optional[str] = None,
         subject: Optional[str] = None,
         chapter: Optional[str] = None,
         reviewed: Optional[bool] = None,
-    ) -> list[Question]:
-        stmt = select(Question)
+        subject_id: Optional[int] = None,
+        chapter_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+    ) -> Select:
         if year:
             stmt = stmt.where(Question.year == year)
         if source:
@@ -44,43 +121,306 @@ class QuestionRepository:
             stmt = stmt.where(Question.chapter == chapter)
         if reviewed is not None:
             stmt = stmt.where(Question.reviewed == reviewed)
+        if subject_id is not None:
+            stmt = stmt.where(Question.subject_id == subject_id)
+        if chapter_id is not None:
+            stmt = stmt.where(Question.chapter_id == chapter_id)
+        if topic_id is not None:
+            stmt = stmt.where(Question.topic_id == topic_id)
+        return stmt
+
+    async def search(
+        self,
+        *,
+        year: Optional[str] = None,
+        source: Optional[str] = None,
+        subject: Optional[str] = None,
+        chapter: Optional[str] = None,
+        reviewed: Optional[bool] = None,
+        subject_id: Optional[int] = None,
+        chapter_id: Optional[int] = None,
+        topic_id: Optional[int] = None,
+    ) -> list[Question]:
+        stmt = self._filter(
+            select(Question).options(*QUESTION_SEARCH_LOAD),
+            year=year,
+            source=source,
+            subject=subject,
+            chapter=chapter,
+            reviewed=reviewed,
+            subject_id=subject_id,
+            chapter_id=chapter_id,
+            topic_id=topic_id,
+        )
+        stmt = stmt.order_by(*QUESTION_PAPER_ORDER)
+        return list(await self.session.scalars(stmt))
+
+    async def stream(
+        self, *, chunk_size: int, **filters
+    ) -> AsyncIterator[list[Question]]:
+        # Keyset pages of chunk_size questions by id, each with its options
+        # from one IN query; rows are not kept by the session once the caller
+        # drops them. (Not yield_per with selectinload: SQLAlchemy refuses that
+        # combination as soon as any do_orm_execute listener is installed.)
+        expect_repeated_queries()
+        after = 0
+        while True:
+            stmt = self._filter(select(Question), **filters)
+            stmt = stmt.where(Question.id > after).order_by(Question.id)
+            chunk = list(await self.session.scalars(stmt.limit(chunk_size)))
+            if not chunk:
+                return
+
+            options: dict[int, list[Option]] = {row.id: [] for row in chunk}
+            option_stmt = (
+                select(Option)
+                .where(Option.question_id.in_(list(options)))
+                .order_by(Option.id)
+            )
+            for option in await self.session.scalars(option_stmt):
+                options[option.question_id].append(option)
+            for row in chunk:
+                set_committed_value(row, "options", options[row.id])
+            yield chunk
+            after = chunk[-1].id
+
+    async def changes(
+        self, *, since: Optional[str], limit: int, settle_seconds: float
+    ) -> ChangeSet[Question]:
+        # Up to limit changed questions and limit deleted ids past the
+        # watermark. Rows are stamped with their transaction's start time but
+        # only become visible at commit (on a replica, once replayed), so
+        # changes newer than settle_seconds before now, or before the last
+        # replayed commit, are left for a later call; otherwise a slow
+        # transaction could commit rows behind a watermark already handed out
+        position = list(
+            decode_cursor(since, QUESTION_SYNC_WATERMARK) if since else _SYNC_ORIGIN
+        )
+        horizon = select(
+            func.least(
+                func.localtimestamp(),
+                cast(func.pg_last_xact_replay_timestamp(), TIMESTAMP),
+            )
+            - timedelta(seconds=settle_seconds)
+        ).scalar_subquery()
+
+        stmt = (
+            select(Question)
+            .options(*QUESTION_LIST_LOAD)
+            .where(
+                tuple_(Question.updated_at, Question.id) > tuple_(*position[:2]),
+                Question.updated_at < horizon,
+            )
+            .order_by(Question.updated_at, Question.id)
+            .limit(limit + 1)
+        )
+        changed = list(await self.session.scalars(stmt))
+        stmt = (
+            select(QuestionTombstone.deleted_at, QuestionTombstone.question_id)
+            .where(
+                tuple_(QuestionTombstone.deleted_at, QuestionTombstone.question_id)
+                > tuple_(*position[2:]),
+                QuestionTombstone.deleted_at < horizon,
+            )
+            .order_by(QuestionTombstone.deleted_at, QuestionTombstone.question_id)
+            .limit(limit + 1)
+        )
+        deleted = (await self.session.execute(stmt)).all()
+
+        has_more = len(changed) > limit or len(deleted) > limit
+        changed, deleted = changed[:limit], deleted[:limit]
+        if changed:
+            position[:2] = changed[-1].updated_at, changed[-1].id
+        if deleted:
+            position[2:] = deleted[-1]
+        return ChangeSet(
+            changed,
+            [row.question_id for row in deleted],
+            encode_cursor(position),
+            has_more,
+        )
 
-        stmt = stmt.order_by(cast(Question.question_number, Integer))
-        return list(self.session.scalars(stmt))
+    async def bundle_fingerprints(self) -> list[Any]:
+        # One row per (subject, year) with its question count and a digest of
+        # every (id, updated_at) in it: any insert, update or delete in the
+        # group changes the digest
+        entry = func.concat(Question.id, "@", Question.updated_at)
+        stmt = select(
+            Question.subject,
+            Question.year,
+            func.count().label("questions"),
+            func.md5(
+                func.string_agg(entry, aggregate_order_by(literal(","), Question.id))
+            ).label("fingerprint"),
+        ).group_by(Question.subject, Question.year)
+        return list(await self.session.execute(stmt))
 
-    def get_by_question_number(
+    async def list_for_bundle(
+        self, *, subject: Optional[str], year: Optional[str]
+    ) -> list[Question]:
+        stmt = (
+            select(Question)
+            .options(*QUESTION_LIST_LOAD)
+            .where(
+                Question.subject == subject
+                if subject is not None
+                else Question.subject.is_(None),
+                Question.year == year if year is not None else Question.year.is_(None),
+            )
+            .order_by(*QUESTION_PAPER_ORDER)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def facets(self) -> dict[str, Any]:
+        return await count_facets(
+            self.session,
+            [
+                Question.source,
+                Question.year,
+                Question.subject,
+                Question.chapter,
+                Question.topic,
+                Question.reviewed,
+            ],
+        )
+
+    async def get_by_question_number(
         self, *, year: str, question_number: str
     ) -> Optional[Question]:
         stmt = (
             select(Question)
+            .options(*QUESTION_DETAIL_LOAD)
             .where(
                 Question.year == year,
+                Question.question_sort_key == number_sort_key(literal(question_number)),
                 Question.question_number == question_number,
             )
             .order_by(Question.id)
             .limit(1)
         )
-        return self.session.scalars(stmt).first()
+        return (await self.session.scalars(stmt)).unique().first()
 
-    def get(self, question_id: int) -> Optional[Question]:
-        return self.session.get(Question, question_id)
+    async def get_many(self, ids: list[int]) -> list[Question]:
+        # Options are joined in, so the whole batch is one round trip
+        stmt = (
+            select(Question).options(*QUESTION_DETAIL_LOAD).where(Question.id.in_(ids))
+        )
+        return list((await self.session.scalars(stmt)).unique())
 
-    def create(self, question: Question) -> Question:
-        self.session.add(question)
-        self.session.commit()
-        self.session.refresh(question)
-        return question
+    async def get(self, question_id: int) -> Optional[Question]:
+        return await self.session.get(
+            Question, question_id, options=QUESTION_DETAIL_LOAD
+        )
+
+    async def bulk_create(
+        self, payloads: list[schemas.QuestionCreate], taxonomy: TaxonomyResolver
+    ) -> list[int]:
+        # Upserts by natural key, so posting a paper again updates its
+        # questions instead of duplicating them; returns the ids in order
+        items = [
+            (
+                {
+                    **payload.model_dump(exclude={"options"}),
+                    **taxonomy.resolve(payload.subject, payload.chapter, payload.topic),
+                },
+                [option.model_dump() for option in payload.options],
+            )
+            for payload in payloads
+        ]
+        try:
+            ids = await upsert_questions(self.session, Question, Option, items)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return ids
+
+    async def promote(
+        self, *, ids: Optional[list[int]], staged: str, **filters
+    ) -> dict[str, int]:
+        # Copies the matching staged questions and their options into the
+        # bank in one statement: INSERT ... SELECT CTEs (copy_questions)
+        # upsert them from a locking SELECT over the staged rows, so nothing
+        # is round-tripped through Python. The staged rows are then marked
+        # with their bank id, deleted, or left as they are. Rows already
+        # marked are skipped.
+        src = StageQuestionRepository._filter(
+            select(
+                StageQuestion.id,
+                *(getattr(StageQuestion, name) for name in QUESTION_COLUMNS),
+            ),
+            **filters,
+        )
+        if ids is not None:
+            src = src.where(StageQuestion.id.in_(ids))
+        src = (
+            src.where(StageQuestion.promoted_question_id.is_(None))
+            .order_by(StageQuestion.id)
+            .with_for_update()
+            .cte("src")
+        )
+        copy = copy_questions(Question, Option, src, StageOption.__table__)
+        extra_ctes = [copy.replaced]
+        if staged == "mark":
+            staged_rows = (
+                update(StageQuestion)
+                .where(StageQuestion.id == copy.links.c.id)
+                .values(promoted_question_id=copy.links.c.question_id)
+                .returning(StageQuestion.id)
+                .cte("staged_rows")
+            )
+        elif staged == "delete":
+            extra_ctes.append(
+                delete(StageOption)
+                .where(StageOption.question_id == src.c.id)
+                .cte("deleted_stage_options")
+            )
+            staged_rows = (
+                delete(StageQuestion)
+                .where(StageQuestion.id == src.c.id)
+                .returning(StageQuestion.id)
+                .cte("staged_rows")
+            )
+        else:
+            staged_rows = None
+
+        stmt = select(
+            select(func.count()).select_from(copy.written).scalar_subquery(),
+            select(func.count()).select_from(copy.options).scalar_subquery(),
+            select(func.count()).select_from(staged_rows).scalar_subquery()
+            if staged_rows is not None
+            else literal(0),
+        ).add_cte(*extra_ctes)
+        try:
+            row = (await self.session.execute(stmt)).one()
+            record_written_tables(
+                self.session.sync_session,
+                Question.__tablename__,
+                Option.__tablename__,
+                StageQuestion.__tablename__,
+                StageOption.__tablename__,
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return {"questions": row[0], "options": row[1], "staged": row[2]}
 
-    def update(self, question: Question, **fields) -> Question:
+    async def update(self, question: Question, **fields) -> Question:
         for key, value in fields.items():
             if value is not None:
                 setattr(question, key, value)
+        if any(self.session.is_modified(option) for option in question.options):
+            # Option edits alone leave the question row untouched; bump it so
+            # delta sync picks them up
+            question.updated_at = func.current_timestamp()
 
         self.session.add(question)
-        self.session.commit()
-        self.session.refresh(question)
+        await self.session.commit()
+        await self.session.refresh(question, ["updated_at", "options"])
         return question
 
-    def delete(self, question: Question) -> None:
-        self.session.delete(question)
-        self.session.commit()
+    async def delete(self, question: Question) -> None:
+        await self.session.delete(question)
+        self.session.add(QuestionTombstone(question_id=question.id))
+        await self.session.commit()
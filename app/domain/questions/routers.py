@@ -1,50 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+import contextlib
+from pathlib import Path
+from typing import Any
 
-from app.dependencies import get_db
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.serialization import ORMSerializer
+from app.dependencies import PageParams, get_db
 from app.domain.questions import schemas
+from app.domain.questions.bundles import BUNDLE_CACHE_CONTROL, BUNDLE_NAME, MANIFEST
+from app.domain.questions.export import MEDIA_TYPES, ExportFormat, export_questions
 from app.domain.questions.services import QuestionService
 from app.domain.process_questions.services import StageQuestionService
+from app.interfaces.api.bulk import bulk_create
+from app.interfaces.api.files import conditional_file_response
+from app.interfaces.api.schemas import Batch, BulkResult, Changes, Page
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
+question_serializer = ORMSerializer(schemas.QuestionRead)
+
 
-def get_question_service(db: Session = Depends(get_db)) -> QuestionService:
+def get_question_service(db: AsyncSession = Depends(get_db)) -> QuestionService:
     return QuestionService(db)
 
 
-def get_stage_question_service(db: Session = Depends(get_db)) -> StageQuestionService:
+def get_stage_question_service(
+    db: AsyncSession = Depends(get_db),
+) -> StageQuestionService:
     return StageQuestionService(db)
 
 
-@router.get("/", response_model=list[schemas.QuestionRead])
-def list_questions(service: QuestionService = Depends(get_question_service)):
-    return service.list_questions()
+@router.get("/", response_model=Page[schemas.QuestionRead])
+async def list_questions(
+    page: PageParams = Depends(),
+    service: QuestionService = Depends(get_question_service),
+):
+    return question_serializer.page_response(
+        await service.list_questions(cursor=page.cursor, limit=page.limit)
+    )
 
 
 @router.get("/search", response_model=list[schemas.QuestionSearchRead])
-def search_questions(
+async def search_questions(
     year: str | None = Query(None),
     source: str | None = Query(None),
     subject: str | None = Query(None),
     chapter: str | None = Query(None),
     reviewed: bool | None = Query(None),
+    subject_id: int | None = Query(None),
+    chapter_id: int | None = Query(None),
+    topic_id: int | None = Query(None),
+    service: QuestionService = Depends(get_question_service),
+):
+    return await service.search_questions(
+        year=year,
+        source=source,
+        subject=subject,
+        chapter=chapter,
+        reviewed=reviewed,
+        subject_id=subject_id,
+        chapter_id=chapter_id,
+        topic_id=topic_id,
+    )
+
+
+@router.get("/facets", response_model=schemas.QuestionFacets)
+async def get_question_facets(
+    service: QuestionService = Depends(get_question_service),
+):
+    return await service.get_facets()
+
+
+@router.get("/changes", response_model=Changes[schemas.QuestionRead])
+async def get_question_changes(
+    since: str | None = Query(
+        None, description="watermark from the previous call; omit for a full sync"
+    ),
+    limit: int = Query(settings.API_PAGE_SIZE, ge=1, le=settings.API_MAX_PAGE_SIZE),
     service: QuestionService = Depends(get_question_service),
 ):
-    return service.search_questions(
-        year=year, source=source, subject=subject, chapter=chapter, reviewed=reviewed
+    return question_serializer.changes_response(
+        await service.get_changes(since=since, limit=limit)
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_question_bank(
+    format: ExportFormat = Query("ndjson"),
+    year: str | None = Query(None),
+    source: str | None = Query(None),
+    subject: str | None = Query(None),
+    chapter: str | None = Query(None),
+    reviewed: bool | None = Query(None),
+    service: QuestionService = Depends(get_question_service),
+):
+    content = export_questions(
+        service,
+        format,
+        year=year,
+        source=source,
+        subject=subject,
+        chapter=chapter,
+        reviewed=reviewed,
+    )
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="questions.{format}"'},
+    )
+
+
+@router.get("/bundles", response_model=schemas.BundleManifest)
+async def get_bundle_manifest(request: Request):
+    path = Path(settings.BUNDLE_DIR) / MANIFEST
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Bundles not built yet"
+        )
+    # Clients revalidate on every sync, usually getting a 304
+    return conditional_file_response(
+        request,
+        path,
+        stat_result=stat_result,
+        media_type="application/json",
+        cache_control="no-cache",
+    )
+
+
+@router.get("/bundles/{name}", response_class=FileResponse)
+async def get_bundle(name: str, request: Request):
+    path = Path(settings.BUNDLE_DIR) / name
+    stat_result = None
+    if BUNDLE_NAME.match(name):
+        with contextlib.suppress(FileNotFoundError):
+            stat_result = path.stat()
+    if stat_result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Bundle not found"
+        )
+    # Named by content hash: a name always means the same bytes
+    return conditional_file_response(
+        request,
+        path,
+        stat_result=stat_result,
+        media_type="application/gzip",
+        cache_control=BUNDLE_CACHE_CONTROL,
+        etag=f'"{name.split(".")[0]}"',
     )
 
 
 @router.get(
     "/by-question-number/{question_number}", response_model=schemas.QuestionRead
 )
-def get_question_by_question_number(
+async def get_question_by_question_number(
     question_number: str,
     year: str = Query(...),
     service: QuestionService = Depends(get_question_service),
 ):
-    question = service.get_question_by_question_number(
+    question = await service.get_question_by_question_number(
         year=year, question_number=question_number
     )
     if not question:
@@ -54,12 +173,38 @@ def get_question_by_question_number(
     return question
 
 
+@router.get("/batch", response_model=Batch[schemas.QuestionRead])
+async def get_questions_batch(
+    ids: list[int] = Query(
+        ...,
+        max_length=settings.BATCH_MAX_IDS,
+        description="Question ids, one ?ids= per id; POST for long lists",
+    ),
+    service: QuestionService = Depends(get_question_service),
+):
+    questions, missing = await service.get_questions_by_ids(ids)
+    return question_serializer.batch_response(questions, missing)
+
+
+@router.post("/batch", response_model=Batch[schemas.QuestionRead])
+async def post_questions_batch(
+    ids: list[int] = Body(
+        ...,
+        max_length=settings.BATCH_MAX_IDS,
+        description="JSON array of question ids",
+    ),
+    service: QuestionService = Depends(get_question_service),
+):
+    questions, missing = await service.get_questions_by_ids(ids)
+    return question_serializer.batch_response(questions, missing)
+
+
 @router.get("/{question_id}", response_model=schemas.QuestionRead)
-def get_question(
+async def get_question(
     question_id: int,
     service: QuestionService = Depends(get_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Question not found"
@@ -70,38 +215,72 @@ def get_question(
 @router.post(
     "/", response_model=schemas.QuestionRead, status_code=status.HTTP_201_CREATED
 )
-def create_question(
+async def create_question(
     payload: schemas.QuestionCreate,
     service: QuestionService = Depends(get_question_service),
 ):
-    return service.create_question(payload)
+    return await service.create_question(payload)
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_questions(
+    items: list[dict[str, Any]] = Body(
+        ...,
+        max_length=settings.BULK_MAX_ITEMS,
+        description="QuestionCreate objects; each is validated and reported separately",
+    ),
+    service: QuestionService = Depends(get_question_service),
+):
+    return await bulk_create(
+        items,
+        schemas.QuestionCreate,
+        service.bulk_create_questions,
+        chunk_size=settings.BULK_CHUNK_SIZE,
+    )
 
 
 @router.patch("/{question_id}", response_model=schemas.QuestionRead)
-def update_question(
+async def update_question(
     question_id: int,
     payload: schemas.QuestionUpdate,
     service: QuestionService = Depends(get_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Question not found"
         )
-    return service.update_question(question, payload)
+    try:
+        return await service.update_question(question, payload)
+    except IntegrityError:
+        # The natural key unique index, or the one on option labels
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another question has the same source, year and question "
+            "number, or two options have the same label",
+        )
 
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_question(
+async def delete_question(
     question_id: int,
     service: QuestionService = Depends(get_question_service),
 ):
-    question = service.get_question(question_id)
+    question = await service.get_question(question_id)
     if not question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Question not found"
         )
-    service.delete_question(question)
+    await service.delete_question(question)
+
+
+@router.post("/promote", response_model=schemas.QuestionPromotionResult)
+async def promote_staged_questions(
+    payload: schemas.QuestionPromotion,
+    service: QuestionService = Depends(get_question_service),
+):
+    # Set-based move of many staged questions at once, in one transaction
+    return await service.promote_staged_questions(payload)
 
 
 @router.post(
@@ -109,12 +288,12 @@ def delete_question(
     response_model=schemas.QuestionRead,
     status_code=status.HTTP_201_CREATED,
 )
-def move_question(
+async def move_question(
     stage_question_id: int,
     service: QuestionService = Depends(get_question_service),
     stage_service: StageQuestionService = Depends(get_stage_question_service),
 ):
-    stage_question = stage_service.get_question(stage_question_id)
+    stage_question = await stage_service.get_question(stage_question_id)
     if not stage_question:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Stage Question not found"
@@ -153,4 +332,4 @@ def move_question(
         options=options,
     )
 
-    return service.create_question(question_create)
+    return await service.create_question(question_create)
@@ -1,7 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from app.core.config import settings
+from app.interfaces.api.schemas import FacetCount
 
 
 # --- Option Schemas ---
@@ -107,6 +110,65 @@ class QuestionRead(QuestionBase):
     created_at: datetime
     updated_at: datetime
     ai_answer: Optional[str] = None
+    subject_id: Optional[int] = None
+    chapter_id: Optional[int] = None
+    topic_id: Optional[int] = None
     options: list[OptionRead] = []
 
     model_config = {"from_attributes": True}
+
+
+class QuestionFacets(BaseModel):
+    # Counts per value of each filter column, for the filter sidebar
+    total: int
+    source: list[FacetCount]
+    year: list[FacetCount]
+    subject: list[FacetCount]
+    chapter: list[FacetCount]
+    topic: list[FacetCount]
+    reviewed: list[FacetCount]
+
+
+class BundleEntry(BaseModel):
+    subject: Optional[str]
+    year: Optional[str]
+    questions: int
+    # Changes whenever a question of the group is added, edited or deleted
+    fingerprint: str
+    # GET /api/questions/bundles/{file}: gzipped JSON array of QuestionRead
+    file: str
+    size: int
+
+
+class BundleManifest(BaseModel):
+    generated_at: datetime
+    bundles: list[BundleEntry]
+
+
+class QuestionPromotion(BaseModel):
+    # Staged questions to copy into the bank: those listed in ids, or every
+    # one matching the filters (which also narrow ids). Staged questions
+    # already promoted are skipped.
+    ids: Optional[list[int]] = Field(None, max_length=settings.BULK_MAX_ITEMS)
+    year: Optional[str] = None
+    source: Optional[str] = None
+    subject: Optional[str] = None
+    # None promotes reviewed and unreviewed alike
+    reviewed: Optional[bool] = True
+    # What happens to the staged rows: "mark" sets their promoted_question_id,
+    # "delete" removes them with their options, "keep" leaves them as they are
+    staged: Literal["keep", "mark", "delete"] = "mark"
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "QuestionPromotion":
+        if self.ids is None and not (self.year or self.source):
+            raise ValueError("Give ids, or a year or source to promote")
+        return self
+
+
+class QuestionPromotionResult(BaseModel):
+    questions: int
+    options: int
+    # Staged questions marked or deleted
+    staged: int
+    duration_ms: float
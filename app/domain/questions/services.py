@@ -1,29 +1,66 @@
-from sqlalchemy.orm import Session
+import time
+from typing import Any, AsyncIterator
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.pagination import ChangeSet, KeysetPage
+from app.db.table_cache import TableCache
 from app.domain.questions import schemas
-from app.domain.questions.models import Option, Question
+from app.domain.questions.models import Question
 from app.domain.questions.repository import QuestionRepository
+from app.domain.subjects.taxonomy import get_taxonomy
+
+facets_cache = TableCache(Question.__tablename__, ttl=settings.FACETS_CACHE_TTL)
 
 
 class QuestionService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
         self.repo = QuestionRepository(session)
 
-    def list_questions(self) -> list[Question]:
-        return self.repo.list()
+    async def list_questions(
+        self, *, cursor: str | None, limit: int
+    ) -> KeysetPage[Question]:
+        return await self.repo.list(cursor=cursor, limit=limit)
 
-    def search_questions_by_year(self, year: str) -> list[Question]:
-        return self.repo.list_by_year(year)
+    async def search_questions_by_year(self, year: str) -> list[Question]:
+        return await self.repo.list_by_year(year)
 
-    def search_questions(
+    async def search_questions(
         self,
         year: str | None = None,
         source: str | None = None,
         subject: str | None = None,
         chapter: str | None = None,
         reviewed: bool | None = None,
+        subject_id: int | None = None,
+        chapter_id: int | None = None,
+        topic_id: int | None = None,
     ) -> list[Question]:
-        return self.repo.search(
+        return await self.repo.search(
+            year=year,
+            source=source,
+            subject=subject,
+            chapter=chapter,
+            reviewed=reviewed,
+            subject_id=subject_id,
+            chapter_id=chapter_id,
+            topic_id=topic_id,
+        )
+
+    def stream_questions(
+        self,
+        *,
+        chunk_size: int,
+        year: str | None = None,
+        source: str | None = None,
+        subject: str | None = None,
+        chapter: str | None = None,
+        reviewed: bool | None = None,
+    ) -> AsyncIterator[list[Question]]:
+        return self.repo.stream(
+            chunk_size=chunk_size,
             year=year,
             source=source,
             subject=subject,
@@ -31,51 +68,77 @@ class QuestionService:
             reviewed=reviewed,
         )
 
-    def get_question_by_question_number(
+    async def get_changes(
+        self, *, since: str | None, limit: int
+    ) -> ChangeSet[Question]:
+        return await self.repo.changes(
+            since=since, limit=limit, settle_seconds=settings.SYNC_SETTLE_SECONDS
+        )
+
+    async def get_bundle_fingerprints(self) -> list[Any]:
+        return await self.repo.bundle_fingerprints()
+
+    async def get_questions_for_bundle(
+        self, *, subject: str | None, year: str | None
+    ) -> list[Question]:
+        return await self.repo.list_for_bundle(subject=subject, year=year)
+
+    async def get_facets(self) -> dict[str, Any]:
+        return await facets_cache.get_or_load(self.repo.facets)
+
+    async def get_question_by_question_number(
         self, *, year: str, question_number: str
     ) -> Question | None:
-        return self.repo.get_by_question_number(
+        return await self.repo.get_by_question_number(
             year=year, question_number=question_number
         )
 
-    def get_question(self, question_id: int) -> Question | None:
-        return self.repo.get(question_id)
+    async def get_question(self, question_id: int) -> Question | None:
+        return await self.repo.get(question_id)
 
-    def create_question(self, payload: schemas.QuestionCreate) -> Question:
-        # Create Question instance
-        question = Question(
-            source=payload.source,
+    async def get_questions_by_ids(
+        self, ids: list[int]
+    ) -> tuple[list[Question], list[int]]:
+        # Returns the questions in request order (each id once) and the ids
+        # that were not found
+        ids = list(dict.fromkeys(ids))
+        found = {question.id: question for question in await self.repo.get_many(ids)}
+        return (
+            [found[question_id] for question_id in ids if question_id in found],
+            [question_id for question_id in ids if question_id not in found],
+        )
+
+    async def bulk_create_questions(
+        self, payloads: list[schemas.QuestionCreate]
+    ) -> list[int]:
+        taxonomy = await get_taxonomy(self.session)
+        return await self.repo.bulk_create(payloads, taxonomy)
+
+    async def promote_staged_questions(
+        self, payload: schemas.QuestionPromotion
+    ) -> dict[str, Any]:
+        started = time.perf_counter()
+        counts = await self.repo.promote(
+            ids=payload.ids,
+            staged=payload.staged,
             year=payload.year,
+            source=payload.source,
             subject=payload.subject,
-            chapter=payload.chapter,
-            topic=payload.topic,
-            question_number=payload.question_number,
-            question_text=payload.question_text,
-            difficulty=payload.difficulty,
-            has_diagram=payload.has_diagram,
-            diagram_description=payload.diagram_description,
-            diagram_position=payload.diagram_position,
-            diagram_name=payload.diagram_name,
-            answer=payload.answer,
-            ai_answer=payload.ai_answer,
-            solution=payload.solution,
             reviewed=payload.reviewed,
         )
+        return {
+            **counts,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
 
-        # Create Option instances and associate them
-        for opt_payload in payload.options:
-            option = Option(
-                label=opt_payload.label,
-                text=opt_payload.text,
-                has_diagram=opt_payload.has_diagram,
-                diagram_description=opt_payload.diagram_description,
-                diagram_name=opt_payload.diagram_name,
-            )
-            question.options.append(option)
+    async def create_question(self, payload: schemas.QuestionCreate) -> Question:
+        # Same upsert as the bulk path: posting a question that exists (same
+        # source, year and question number) updates it
+        taxonomy = await get_taxonomy(self.session)
+        [question_id] = await self.repo.bulk_create([payload], taxonomy)
+        return await self.repo.get(question_id)
 
-        return self.repo.create(question)
-
-    def update_question(
+    async def update_question(
         self, question: Question, payload: schemas.QuestionUpdate
     ) -> Question:
         fields: dict[str, object] = {}
@@ -125,7 +188,19 @@ class QuestionService:
                         question.options[index].diagram_name = opt_payload.diagram_name
                         break
 
-        return self.repo.update(question, **fields)
+        if fields.keys() & {"subject", "chapter", "topic"}:
+            taxonomy = await get_taxonomy(self.session)
+            ids = taxonomy.resolve(
+                fields.get("subject", question.subject),
+                fields.get("chapter", question.chapter),
+                fields.get("topic", question.topic),
+            )
+            # Set directly: repo.update skips None, and a name that no
+            # longer resolves has to clear the old id
+            for key, value in ids.items():
+                setattr(question, key, value)
+
+        return await self.repo.update(question, **fields)
 
-    def delete_question(self, question: Question) -> None:
-        self.repo.delete(question)
+    async def delete_question(self, question: Question) -> None:
+        await self.repo.delete(question)
@@ -1,4 +1,13 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, TIMESTAMP, func
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    String,
+    ForeignKey,
+    Index,
+    TIMESTAMP,
+    func,
+)
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
 
@@ -22,8 +31,12 @@ class Subject(Base):
         onupdate=func.current_timestamp(),
     )
 
+    # Never lazy loaded (see Question.options)
     chapters = relationship(
-        "Chapter", back_populates="subject", cascade="all, delete-orphan"
+        "Chapter",
+        back_populates="subject",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
     )
 
 
@@ -40,12 +53,18 @@ class Chapter(Base):
     subject_id = Column(
         Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False
     )
-    subject = relationship("Subject", back_populates="chapters")
+    subject = relationship("Subject", back_populates="chapters", lazy="raise_on_sql")
 
     topics = relationship(
-        "Topic", back_populates="chapter", cascade="all, delete-orphan"
+        "Topic",
+        back_populates="chapter",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
     )
 
+    # Keyset pagination of a subject's chapters seeks on (subject_id, id)
+    __table_args__ = (Index("ix_chapters_subject_id_id", "subject_id", "id"),)
+
 
 class Topic(Base):
     __tablename__ = "topics"
@@ -60,4 +79,6 @@ class Topic(Base):
     chapter_id = Column(
         Integer, ForeignKey("chapters.id", ondelete="CASCADE"), nullable=False
     )
-    chapter = relationship("Chapter", back_populates="topics")
+    chapter = relationship("Chapter", back_populates="topics", lazy="raise_on_sql")
+
+    __table_args__ = (Index("ix_topics_chapter_id_id", "chapter_id", "id"),)
@@ -1,8 +1,10 @@
-from typing import Optional, Sequence
+from typing import Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.db.pagination import KeysetPage, keyset_paginate
 from app.domain.subjects.models import Chapter, Subject, Topic
 from app.domain.subjects.schemas import (
     ChapterCreate,
@@ -15,18 +17,18 @@ from app.domain.subjects.schemas import (
 
 
 class SubjectsRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     # --- Subject Methods ---
-    def create_subject(self, subject: SubjectCreate) -> Subject:
+    async def create_subject(self, subject: SubjectCreate) -> Subject:
         db_subject = Subject(
             subject_name=subject.subject_name,
             no_of_questions=subject.no_of_questions,
             is_active=subject.is_active,
         )
         self.db.add(db_subject)
-        self.db.flush()  # Flush to get the ID
+        await self.db.flush()  # Flush to get the ID
 
         if subject.chapters:
             for chapter_data in subject.chapters:
@@ -39,7 +41,7 @@ class SubjectsRepository:
                     is_active=chapter_data.is_active,
                 )
                 self.db.add(db_chapter)
-                self.db.flush()
+                await self.db.flush()
 
                 if chapter_data.topics:
                     for topic_data in chapter_data.topics:
@@ -53,37 +55,61 @@ class SubjectsRepository:
                         )
                         self.db.add(db_topic)
 
-        self.db.commit()
-        self.db.refresh(db_subject)
-        return db_subject
+        await self.db.commit()
+        return await self._reload_subject(db_subject.id)
 
-    def get_subject(self, subject_id: int) -> Optional[Subject]:
-        return self.db.execute(
-            select(Subject).where(Subject.id == subject_id)
+    async def get_subject(self, subject_id: int) -> Optional[Subject]:
+        return (
+            await self.db.execute(
+                select(Subject)
+                .options(selectinload(Subject.chapters).selectinload(Chapter.topics))
+                .where(Subject.id == subject_id)
+            )
         ).scalar_one_or_none()
 
-    def get_subjects(self, skip: int = 0, limit: int = 100) -> Sequence[Subject]:
-        return (
-            self.db.execute(select(Subject).offset(skip).limit(limit)).scalars().all()
+    async def get_subjects(
+        self, *, cursor: Optional[str], limit: int
+    ) -> KeysetPage[Subject]:
+        stmt = select(Subject).options(
+            selectinload(Subject.chapters).selectinload(Chapter.topics)
+        )
+        return await keyset_paginate(
+            self.db, stmt, [Subject.id], cursor=cursor, limit=limit
         )
 
-    def update_subject(
+    async def subject_exists(self, subject_id: int) -> bool:
+        # For validation only; avoids loading the chapter and topic tree
+        stmt = select(Subject.id).where(Subject.id == subject_id)
+        return await self.db.scalar(stmt) is not None
+
+    async def update_subject(
         self, db_subject: Subject, subject_update: SubjectUpdate
     ) -> Subject:
         update_data = subject_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_subject, key, value)
         self.db.add(db_subject)
-        self.db.commit()
-        self.db.refresh(db_subject)
-        return db_subject
+        await self.db.commit()
+        return await self._reload_subject(db_subject.id)
+
+    async def delete_subject(self, db_subject: Subject) -> None:
+        await self.db.delete(db_subject)
+        await self.db.commit()
 
-    def delete_subject(self, db_subject: Subject) -> None:
-        self.db.delete(db_subject)
-        self.db.commit()
+    async def _reload_subject(self, subject_id: int) -> Subject:
+        # Re-select so server-side timestamps and the nested collections are
+        # loaded up front; lazy loads are not available on an AsyncSession
+        return (
+            await self.db.execute(
+                select(Subject)
+                .options(selectinload(Subject.chapters).selectinload(Chapter.topics))
+                .where(Subject.id == subject_id)
+                .execution_options(populate_existing=True)
+            )
+        ).scalar_one()
 
     # --- Chapter Methods ---
-    def create_chapter(self, chapter: ChapterCreate) -> Chapter:
+    async def create_chapter(self, chapter: ChapterCreate) -> Chapter:
         db_chapter = Chapter(
             no=chapter.no,
             name=chapter.name,
@@ -93,7 +119,7 @@ class SubjectsRepository:
             is_active=chapter.is_active,
         )
         self.db.add(db_chapter)
-        self.db.flush()
+        await self.db.flush()
 
         if chapter.topics:
             for topic_data in chapter.topics:
@@ -107,46 +133,53 @@ class SubjectsRepository:
                 )
                 self.db.add(db_topic)
 
-        self.db.commit()
-        self.db.refresh(db_chapter)
+        await self.db.commit()
+        await self.db.refresh(db_chapter, ["topics"])
         return db_chapter
 
-    def get_chapter(self, chapter_id: int) -> Optional[Chapter]:
-        return self.db.execute(
-            select(Chapter).where(Chapter.id == chapter_id)
-        ).scalar_one_or_none()
-
-    def get_chapters_by_subject(
-        self, subject_id: int, skip: int = 0, limit: int = 100
-    ) -> Sequence[Chapter]:
+    async def get_chapter(self, chapter_id: int) -> Optional[Chapter]:
         return (
-            self.db.execute(
+            await self.db.execute(
                 select(Chapter)
-                .where(Chapter.subject_id == subject_id)
-                .offset(skip)
-                .limit(limit)
+                .options(selectinload(Chapter.topics))
+                .where(Chapter.id == chapter_id)
             )
-            .scalars()
-            .all()
+        ).scalar_one_or_none()
+
+    async def chapter_exists(self, chapter_id: int) -> bool:
+        stmt = select(Chapter.id).where(Chapter.id == chapter_id)
+        return await self.db.scalar(stmt) is not None
+
+    async def get_chapters_by_subject(
+        self, subject_id: int, *, cursor: Optional[str], limit: int
+    ) -> KeysetPage[Chapter]:
+        # Served by ix_chapters_subject_id_id
+        stmt = (
+            select(Chapter)
+            .options(selectinload(Chapter.topics))
+            .where(Chapter.subject_id == subject_id)
+        )
+        return await keyset_paginate(
+            self.db, stmt, [Chapter.id], cursor=cursor, limit=limit
         )
 
-    def update_chapter(
+    async def update_chapter(
         self, db_chapter: Chapter, chapter_update: ChapterUpdate
     ) -> Chapter:
         update_data = chapter_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_chapter, key, value)
         self.db.add(db_chapter)
-        self.db.commit()
-        self.db.refresh(db_chapter)
+        await self.db.commit()
+        await self.db.refresh(db_chapter, ["topics"])
         return db_chapter
 
-    def delete_chapter(self, db_chapter: Chapter) -> None:
-        self.db.delete(db_chapter)
-        self.db.commit()
+    async def delete_chapter(self, db_chapter: Chapter) -> None:
+        await self.db.delete(db_chapter)
+        await self.db.commit()
 
     # --- Topic Methods ---
-    def create_topic(self, topic: TopicCreate) -> Topic:
+    async def create_topic(self, topic: TopicCreate) -> Topic:
         db_topic = Topic(
             no=topic.no,
             name=topic.name,
@@ -156,38 +189,33 @@ class SubjectsRepository:
             is_active=topic.is_active,
         )
         self.db.add(db_topic)
-        self.db.commit()
-        self.db.refresh(db_topic)
+        await self.db.commit()
+        await self.db.refresh(db_topic)
         return db_topic
 
-    def get_topic(self, topic_id: int) -> Optional[Topic]:
-        return self.db.execute(
-            select(Topic).where(Topic.id == topic_id)
+    async def get_topic(self, topic_id: int) -> Optional[Topic]:
+        return (
+            await self.db.execute(select(Topic).where(Topic.id == topic_id))
         ).scalar_one_or_none()
 
-    def get_topics_by_chapter(
-        self, chapter_id: int, skip: int = 0, limit: int = 100
-    ) -> Sequence[Topic]:
-        return (
-            self.db.execute(
-                select(Topic)
-                .where(Topic.chapter_id == chapter_id)
-                .offset(skip)
-                .limit(limit)
-            )
-            .scalars()
-            .all()
+    async def get_topics_by_chapter(
+        self, chapter_id: int, *, cursor: Optional[str], limit: int
+    ) -> KeysetPage[Topic]:
+        # Served by ix_topics_chapter_id_id
+        stmt = select(Topic).where(Topic.chapter_id == chapter_id)
+        return await keyset_paginate(
+            self.db, stmt, [Topic.id], cursor=cursor, limit=limit
         )
 
-    def update_topic(self, db_topic: Topic, topic_update: TopicUpdate) -> Topic:
+    async def update_topic(self, db_topic: Topic, topic_update: TopicUpdate) -> Topic:
         update_data = topic_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_topic, key, value)
         self.db.add(db_topic)
-        self.db.commit()
-        self.db.refresh(db_topic)
+        await self.db.commit()
+        await self.db.refresh(db_topic)
         return db_topic
 
-    def delete_topic(self, db_topic: Topic) -> None:
-        self.db.delete(db_topic)
-        self.db.commit()
+    async def delete_topic(self, db_topic: Topic) -> None:
+        await self.db.delete(db_topic)
+        await self.db.commit()
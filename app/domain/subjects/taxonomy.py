@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+from typing import Hashable, Iterable, Optional, Union
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.query_stats import expect_repeated_queries
+from app.db.session import AsyncSessionLocal, dispose_engines
+from app.db.table_cache import TableCache, record_written_tables
+from app.domain.process_questions.models import StageQuestion
+from app.domain.questions.models import Question
+from app.domain.subjects.models import Chapter, Subject, Topic
+from app.utils.string_utils import format_name
+
+QuestionModel = Union[type[Question], type[StageQuestion]]
+
+
+def _name_key(name: Optional[str]) -> Optional[str]:
+    # "UNITS AND MEASUREMENTS", "Units and measurements" and the formatted
+    # name "Units_And_Measurements" all give the same key
+    if not name:
+        return None
+    return format_name(name.replace("_", " ")) or None
+
+
+def _unique(pairs: Iterable[tuple[Hashable, int]]) -> dict[Hashable, Optional[int]]:
+    # Keys shared by different ids map to None: ambiguous names stay unresolved
+    index: dict[Hashable, Optional[int]] = {}
+    for key, value in pairs:
+        index[key] = value if index.get(key, value) == value else None
+    return index
+
+
+class TaxonomyResolver:
+    # Maps the free-text subject/chapter/topic of a question to taxonomy ids.
+    # Chapters are looked up within the resolved subject, topics within the
+    # resolved chapter; when the parent name is empty a name that is unique
+    # across the whole taxonomy is used and the parent ids follow from it.
+    # Names that match nothing, or more than one entry, resolve to None.
+    def __init__(
+        self,
+        subjects: Iterable[tuple[int, str]],
+        chapters: Iterable[tuple[int, int, str, str]],
+        topics: Iterable[tuple[int, int, str, str]],
+    ) -> None:
+        chapters = list(chapters)
+        topics = list(topics)
+        self.subjects = _unique((_name_key(name), id) for id, name in subjects)
+        self.chapters = _unique(
+            ((parent, _name_key(name)), id)
+            for id, subject_id, *names in chapters
+            for name in names
+            for parent in (subject_id, None)
+        )
+        self.topics = _unique(
+            ((parent, _name_key(name)), id)
+            for id, chapter_id, *names in topics
+            for name in names
+            for parent in (chapter_id, None)
+        )
+        self.chapter_subject = {id: subject_id for id, subject_id, *_ in chapters}
+        self.topic_chapter = {id: chapter_id for id, chapter_id, *_ in topics}
+
+    @classmethod
+    async def load(cls, session: AsyncSession) -> "TaxonomyResolver":
+        subjects = await session.execute(select(Subject.id, Subject.subject_name))
+        chapters = await session.execute(
+            select(Chapter.id, Chapter.subject_id, Chapter.name, Chapter.formatted_name)
+        )
+        topics = await session.execute(
+            select(Topic.id, Topic.chapter_id, Topic.name, Topic.formatted_name)
+        )
+        return cls(subjects.tuples(), chapters.tuples(), topics.tuples())
+
+    def resolve(
+        self,
+        subject: Optional[str],
+        chapter: Optional[str],
+        topic: Optional[str],
+    ) -> dict[str, Optional[int]]:
+        subject_key = _name_key(subject)
+        chapter_key = _name_key(chapter)
+        subject_id = self.subjects.get(subject_key)
+        chapter_id = topic_id = None
+
+        # A parent that is named but unknown resolves nothing below it
+        if subject_id is not None or subject_key is None:
+            chapter_id = self.chapters.get((subject_id, chapter_key))
+            if chapter_id is not None:
+                subject_id = self.chapter_subject[chapter_id]
+        if chapter_id is not None or chapter_key is None:
+            topic_id = self.topics.get((chapter_id, _name_key(topic)))
+        if topic_id is not None and chapter_id is None:
+            # Found by name alone: it must sit under the named subject
+            chapter_id = self.topic_chapter[topic_id]
+            parent_subject_id = self.chapter_subject[chapter_id]
+            if subject_key is None or subject_id == parent_subject_id:
+                subject_id = parent_subject_id
+            else:
+                chapter_id = topic_id = None
+        return {
+            "subject_id": subject_id,
+            "chapter_id": chapter_id,
+            "topic_id": topic_id,
+        }
+
+
+taxonomy_cache = TableCache(
+    Subject.__tablename__,
+    Chapter.__tablename__,
+    Topic.__tablename__,
+    ttl=settings.TAXONOMY_CACHE_TTL,
+)
+
+
+async def get_taxonomy(session: AsyncSession) -> TaxonomyResolver:
+    # Used on every question write; the taxonomy changes rarely
+    return await taxonomy_cache.get_or_load(lambda: TaxonomyResolver.load(session))
+
+
+async def backfill_taxonomy_ids(
+    session: AsyncSession, model: QuestionModel, *, batch_size: int
+) -> int:
+    # Walks the table in id order, batch_size rows at a time, and updates
+    # the rows whose resolved ids differ from the stored ones; each batch is
+    # its own transaction so row locks are held briefly. Safe to re-run,
+    # e.g. after chapters or topics were added.
+    taxonomy = await TaxonomyResolver.load(session)
+    expect_repeated_queries()
+    updated = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(
+                model.id,
+                model.subject,
+                model.chapter,
+                model.topic,
+                model.subject_id,
+                model.chapter_id,
+                model.topic_id,
+            )
+            .where(model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+        )
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return updated
+
+        changes = []
+        for row in rows:
+            ids = taxonomy.resolve(row.subject, row.chapter, row.topic)
+            if ids != {
+                "subject_id": row.subject_id,
+                "chapter_id": row.chapter_id,
+                "topic_id": row.topic_id,
+            }:
+                changes.append({"id": row.id, **ids})
+        if changes:
+            # Bulk UPDATE by primary key: one executemany per batch
+            await session.execute(update(model), changes)
+            record_written_tables(session.sync_session, model.__tablename__)
+        await session.commit()
+        updated += len(changes)
+        last_id = rows[-1].id
+
+
+async def main() -> None:
+    # python -m app.domain.subjects.taxonomy --table questions
+    parser = argparse.ArgumentParser(
+        description="Fill subject_id/chapter_id/topic_id of questions from names"
+    )
+    parser.add_argument(
+        "--table",
+        choices=["questions", "stage_questions", "all"],
+        default="all",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    models = {"questions": [Question], "stage_questions": [StageQuestion]}.get(
+        args.table, [Question, StageQuestion]
+    )
+    try:
+        async with AsyncSessionLocal() as session:
+            for model in models:
+                updated = await backfill_taxonomy_ids(
+                    session, model, batch_size=args.batch_size
+                )
+                print(f"{model.__tablename__}: {updated} rows updated")
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,7 @@ from sqlalchemy import (
     func,
     JSON,
     ForeignKey,
+    Index,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
@@ -23,7 +24,7 @@ class MockTest(Base):
     test_status = Column(String(50), nullable=False)
     questions = Column(JSON, nullable=True)
     time_taken = Column(Integer, default=0, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now()
@@ -37,6 +38,9 @@ class MockTest(Base):
     # Relationship to User (backref optional for bidirectional access)
     user = relationship("User", back_populates="mock_tests")
 
+    # Keyset pagination of a user's tests seeks on (user_id, id)
+    __table_args__ = (Index("ix_mock_test_user_id_id", "user_id", "id"),)
+
 
 class TestSettings(Base):
     __tablename__ = "test_settings"
@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.pagination import KeysetPage
 from app.domain.test import schemas
 from app.domain.test.models import TestSettings, MockTest
 from app.domain.test.repository import (
@@ -12,14 +13,14 @@ from app.domain.questions.models import Question
 
 
 class TestService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.repo = TestRepository(session)
 
-    def prepare_test(self) -> list[Question]:
+    async def prepare_test(self) -> list[Question]:
         questions_list = []
-        physics_questions = self.repo.get_questions_by_subject("Physics")
-        chemistry_questions = self.repo.get_questions_by_subject("Chemistry")
-        biology_questions = self.repo.get_questions_by_subject("Biology")
+        physics_questions = await self.repo.get_questions_by_subject("Physics")
+        chemistry_questions = await self.repo.get_questions_by_subject("Chemistry")
+        biology_questions = await self.repo.get_questions_by_subject("Biology")
 
         questions_list.extend(physics_questions)
         questions_list.extend(chemistry_questions)
@@ -27,32 +28,34 @@ class TestService:
 
         return questions_list
 
-    def get_questions_by_subject(self, subject_name: str) -> list[Question]:
-        return self.repo.get_questions_by_subject(subject_name)
+    async def get_questions_by_subject(self, subject_name: str) -> list[Question]:
+        return await self.repo.get_questions_by_subject(subject_name)
 
 
 class TestSettingsService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.repo = TestSettingsRepository(session)
 
-    def list_settings(self) -> list[TestSettings]:
-        return self.repo.list()
+    async def list_settings(self) -> list[TestSettings]:
+        return await self.repo.list()
 
-    def get_settings(self, settings_id: int) -> TestSettings | None:
-        return self.repo.get(settings_id)
+    async def get_settings(self, settings_id: int) -> TestSettings | None:
+        return await self.repo.get(settings_id)
 
-    def get_settings_by_key(self, key: str) -> TestSettings | None:
-        return self.repo.get_by_key(key)
+    async def get_settings_by_key(self, key: str) -> TestSettings | None:
+        return await self.repo.get_by_key(key)
 
-    def create_settings(self, payload: schemas.TestSettingsCreate) -> TestSettings:
+    async def create_settings(
+        self, payload: schemas.TestSettingsCreate
+    ) -> TestSettings:
         settings = TestSettings(
             key=payload.key,
             value=payload.value,
             is_active=payload.is_active,
         )
-        return self.repo.create(settings)
+        return await self.repo.create(settings)
 
-    def update_settings(
+    async def update_settings(
         self, settings: TestSettings, payload: schemas.TestSettingsUpdate
     ) -> TestSettings:
         fields: dict[str, object] = {}
@@ -63,26 +66,30 @@ class TestSettingsService:
         if payload.is_active is not None:
             fields["is_active"] = payload.is_active
 
-        return self.repo.update(settings, **fields)
+        return await self.repo.update(settings, **fields)
 
-    def delete_settings(self, settings: TestSettings) -> None:
-        self.repo.delete(settings)
+    async def delete_settings(self, settings: TestSettings) -> None:
+        await self.repo.delete(settings)
 
 
 class MockTestService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.repo = MockTestRepository(session)
 
-    def list_mock_tests(self) -> list[MockTest]:
-        return self.repo.list()
+    async def list_mock_tests(
+        self, *, cursor: str | None, limit: int
+    ) -> KeysetPage[MockTest]:
+        return await self.repo.list(cursor=cursor, limit=limit)
 
-    def list_mock_tests_by_user(self, user_id: int) -> list[MockTest]:
-        return self.repo.list_by_user(user_id)
+    async def list_mock_tests_by_user(
+        self, user_id: int, *, cursor: str | None, limit: int
+    ) -> KeysetPage[MockTest]:
+        return await self.repo.list_by_user(user_id, cursor=cursor, limit=limit)
 
-    def get_mock_test(self, mock_test_id: int) -> MockTest | None:
-        return self.repo.get(mock_test_id)
+    async def get_mock_test(self, mock_test_id: int) -> MockTest | None:
+        return await self.repo.get(mock_test_id)
 
-    def create_mock_test(self, payload: schemas.MockTestCreate) -> MockTest:
+    async def create_mock_test(self, payload: schemas.MockTestCreate) -> MockTest:
         mock_test = MockTest(
             marks_scored=payload.marks_scored,
             negative_marks=payload.negative_marks,
@@ -91,9 +98,9 @@ class MockTestService:
             time_taken=payload.time_taken,
             user_id=payload.user_id,
         )
-        return self.repo.create(mock_test)
+        return await self.repo.create(mock_test)
 
-    def update_mock_test(
+    async def update_mock_test(
         self, mock_test: MockTest, payload: schemas.MockTestUpdate
     ) -> MockTest:
         fields: dict[str, object] = {}
@@ -108,7 +115,7 @@ class MockTestService:
         if payload.time_taken is not None:
             fields["time_taken"] = payload.time_taken
 
-        return self.repo.update(mock_test, **fields)
+        return await self.repo.update(mock_test, **fields)
 
-    def delete_mock_test(self, mock_test: MockTest) -> None:
-        self.repo.delete(mock_test)
+    async def delete_mock_test(self, mock_test: MockTest) -> None:
+        await self.repo.delete(mock_test)
@@ -1,27 +1,29 @@
 from typing import Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.pagination import KeysetPage, keyset_paginate
 from app.domain.users.models import User
 
 
 class UserRepository:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    def list(self) -> list[User]:
-        stmt = select(User).order_by(User.id)
-        return list(self.session.scalars(stmt))
+    async def list(self, *, cursor: Optional[str], limit: int) -> KeysetPage[User]:
+        return await keyset_paginate(
+            self.session, select(User), [User.id], cursor=cursor, limit=limit
+        )
 
-    def get(self, user_id: int) -> Optional[User]:
-        return self.session.get(User, user_id)
+    async def get(self, user_id: int) -> Optional[User]:
+        return await self.session.get(User, user_id)
 
-    def get_by_email(self, email: str) -> Optional[User]:
+    async def get_by_email(self, email: str) -> Optional[User]:
         stmt = select(User).where(User.email == email)
-        return self.session.scalars(stmt).first()
+        return (await self.session.scalars(stmt)).first()
 
-    def create(
+    async def create(
         self,
         *,
         name: str,
@@ -40,19 +42,19 @@ class UserRepository:
             is_active=is_active,
         )
         self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
+        await self.session.commit()
+        await self.session.refresh(user)
         return user
 
-    def update(self, user: User, **fields) -> User:
+    async def update(self, user: User, **fields) -> User:
         for key, value in fields.items():
             if value is not None:
                 setattr(user, key, value)
         self.session.add(user)
-        self.session.commit()
-        self.session.refresh(user)
+        await self.session.commit()
+        await self.session.refresh(user)
         return user
 
-    def delete(self, user: User) -> None:
-        self.session.delete(user)
-        self.session.commit()
+    async def delete(self, user: User) -> None:
+        await self.session.delete(user)
+        await self.session.commit()
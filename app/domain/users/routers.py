@@ -1,53 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.dependencies import get_db
+from app.dependencies import PageParams, get_db
 from app.domain.users import schemas
 from app.domain.users.services import UserService
+from app.interfaces.api.schemas import Page
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:
+def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     return UserService(db)
 
 
-@router.get("/", response_model=list[schemas.UserRead])
-def list_users(service: UserService = Depends(get_user_service)):
-    return service.list_users()
+@router.get("/", response_model=Page[schemas.UserRead])
+async def list_users(page: PageParams = Depends(), service: UserService = Depends(get_user_service)):
+    return await service.list_users(cursor=page.cursor, limit=page.limit)
 
 
 @router.get("/{user_id}", response_model=schemas.UserRead)
-def get_user(user_id: int, service: UserService = Depends(get_user_service)):
-    user = service.get_user(user_id)
+async def get_user(user_id: int, service: UserService = Depends(get_user_service)):
+    user = await service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
 
 @router.post("/", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
-def create_user(payload: schemas.UserCreate, service: UserService = Depends(get_user_service)):
+async def create_user(payload: schemas.UserCreate, service: UserService = Depends(get_user_service)):
     try:
-        return service.create_user(payload)
+        return await service.create_user(payload)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.patch("/{user_id}", response_model=schemas.UserRead)
-def update_user(
+async def update_user(
     user_id: int,
     payload: schemas.UserUpdate,
     service: UserService = Depends(get_user_service),
 ):
-    user = service.get_user(user_id)
+    user = await service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return service.update_user(user, payload)
+    return await service.update_user(user, payload)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, service: UserService = Depends(get_user_service)):
-    user = service.get_user(user_id)
+async def delete_user(user_id: int, service: UserService = Depends(get_user_service)):
+    user = await service.get_user(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    service.delete_user(user)
+    await service.delete_user(user)
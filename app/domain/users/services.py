@@ -1,28 +1,32 @@
-from sqlalchemy.orm import Session
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import hash_password
+from app.db.pagination import KeysetPage
 from app.domain.users import schemas
 from app.domain.users.models import User
 from app.domain.users.repository import UserRepository
 
 
 class UserService:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self.repo = UserRepository(session)
 
-    def list_users(self) -> list[User]:
-        return self.repo.list()
+    async def list_users(self, *, cursor: str | None, limit: int) -> KeysetPage[User]:
+        return await self.repo.list(cursor=cursor, limit=limit)
 
-    def get_user(self, user_id: int) -> User | None:
-        return self.repo.get(user_id)
+    async def get_user(self, user_id: int) -> User | None:
+        return await self.repo.get(user_id)
 
-    def create_user(self, payload: schemas.UserCreate) -> User:
-        existing = self.repo.get_by_email(payload.email)
+    async def create_user(self, payload: schemas.UserCreate) -> User:
+        existing = await self.repo.get_by_email(payload.email)
         if existing:
             raise ValueError("Email already registered")
 
-        password_hash = hash_password(payload.password)
-        return self.repo.create(
+        # PBKDF2 is CPU bound; keep it off the event loop
+        password_hash = await asyncio.to_thread(hash_password, payload.password)
+        return await self.repo.create(
             name=payload.name,
             email=payload.email,
             mobile=payload.mobile,
@@ -31,7 +35,7 @@ class UserService:
             is_active=payload.is_active,
         )
 
-    def update_user(self, user: User, payload: schemas.UserUpdate) -> User:
+    async def update_user(self, user: User, payload: schemas.UserUpdate) -> User:
         fields: dict[str, object] = {}
         if payload.name is not None:
             fields["name"] = payload.name
@@ -42,9 +46,11 @@ class UserService:
         if payload.is_active is not None:
             fields["is_active"] = payload.is_active
         if payload.password is not None:
-            fields["password_hash"] = hash_password(payload.password)
+            fields["password_hash"] = await asyncio.to_thread(
+                hash_password, payload.password
+            )
 
-        return self.repo.update(user, **fields)
+        return await self.repo.update(user, **fields)
 
-    def delete_user(self, user: User) -> None:
-        self.repo.delete(user)
+    async def delete_user(self, user: User) -> None:
+        await self.repo.delete(user)
@@ -0,0 +1,124 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from app.db.session import AsyncSessionLocal, async_engine, dispose_engines
+from app.domain.subjects.taxonomy import TaxonomyResolver
+from app.ingest.loader import (
+    TARGETS,
+    IngestState,
+    create_scratch_tables,
+    ingest_file,
+)
+from app.ingest.reader import NDJSON_SUFFIXES
+from app.ingest.validation import init_worker
+from app.utils.file_lock import try_lock
+
+INPUT_SUFFIXES = {".json", *NDJSON_SUFFIXES}
+
+
+def input_files(paths: list[Path]) -> list[Path]:
+    # Directories are searched recursively, in name order
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(
+                sorted(
+                    file
+                    for file in path.rglob("*")
+                    if file.is_file() and file.suffix.lower() in INPUT_SUFFIXES
+                )
+            )
+        else:
+            files.append(path)
+    return files
+
+
+async def main() -> None:
+    # python -m app.ingest papers/ --target stage
+    parser = argparse.ArgumentParser(
+        description="Load question JSON files (arrays, single objects or NDJSON) "
+        "into staging or the bank, upserting by source, year and question number"
+    )
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--target", choices=sorted(TARGETS), default="stage")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=Path(".ingest-state.json"),
+        help="progress file; an interrupted run picks up where it stopped",
+    )
+    parser.add_argument(
+        "--rejects",
+        type=Path,
+        help="append records that fail validation here, as NDJSON",
+    )
+    args = parser.parse_args()
+
+    files = input_files(args.paths)
+    state = IngestState(args.state)
+    totals = {"records": 0, "questions": 0, "options": 0, "rejected": 0}
+    started = time.perf_counter()
+    with try_lock(args.state.with_name(f"{args.state.name}.lock")) as locked:
+        if not locked:
+            raise SystemExit(f"{args.state} is in use by another ingest")
+        try:
+            async with AsyncSessionLocal() as session:
+                taxonomy = await TaxonomyResolver.load(session)
+            # Spawned, not forked: the workers must not inherit the event loop
+            # or the connection pools
+            pool = ProcessPoolExecutor(
+                max_workers=args.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(taxonomy,),
+            )
+            rejects = open(args.rejects, "a") if args.rejects else None
+            try:
+                async with async_engine.connect() as connection:
+                    await create_scratch_tables(connection)
+                    for path in files:
+                        stats, error = await ingest_file(
+                            connection,
+                            pool,
+                            path,
+                            target=args.target,
+                            state=state,
+                            batch_size=args.batch_size,
+                            ahead=args.workers * 2,
+                            rejects=rejects,
+                        )
+                        print(
+                            f"{path}: {stats['records']} records, "
+                            f"{stats['questions']} questions and {stats['options']} "
+                            f"options written, {stats['rejected']} rejected"
+                        )
+                        if error is not None:
+                            # Malformed JSON: the records before it are loaded,
+                            # a run after the file is fixed loads it again
+                            print(f"{path}: stopped, {error}")
+                        for name, value in stats.items():
+                            totals[name] += value
+            finally:
+                pool.shutdown(cancel_futures=True)
+                if rejects is not None:
+                    rejects.close()
+        finally:
+            await dispose_engines()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(files)} files, {totals['records']} records in {elapsed:.1f}s "
+        f"({totals['records'] / elapsed:.0f}/s): {totals['questions']} questions, "
+        f"{totals['options']} options, {totals['rejected']} rejected"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
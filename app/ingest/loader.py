@@ -0,0 +1,222 @@
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Identity,
+    MetaData,
+    Table,
+    func,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.upsert import (
+    OPTION_COLUMNS,
+    QUESTION_COLUMNS,
+    QUESTION_NATURAL_KEY,
+    copy_questions,
+)
+from app.domain.process_questions.models import StageOption, StageQuestion
+from app.domain.questions.models import Option, Question
+from app.ingest.reader import RecordReader
+from app.ingest.validation import ValidatedBatch, validate_batch
+
+TARGETS = {
+    "stage": (StageQuestion, StageOption),
+    "bank": (Question, Option),
+}
+
+# Per-connection scratch tables each batch is COPYed into, then merged from
+# in the same transaction; their rows go at commit. ingest_questions.id is
+# the record number in the file, ingest_options.question_id points at it.
+_scratch = MetaData()
+ingest_questions = Table(
+    "ingest_questions",
+    _scratch,
+    Column("id", BigInteger),
+    *(Column(name, Question.__table__.c[name].type) for name in QUESTION_COLUMNS),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+ingest_options = Table(
+    "ingest_options",
+    _scratch,
+    # File order, so options keep theirs
+    Column("id", BigInteger, Identity()),
+    Column("question_id", BigInteger),
+    *(Column(name, Option.__table__.c[name].type) for name in OPTION_COLUMNS),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+_COPY_QUESTIONS = "COPY ingest_questions (id, {}) FROM STDIN".format(
+    ", ".join(QUESTION_COLUMNS)
+)
+_COPY_OPTIONS = "COPY ingest_options (question_id, {}) FROM STDIN".format(
+    ", ".join(OPTION_COLUMNS)
+)
+
+
+def merge_statement(target: str):
+    # Upserts the scratch rows into the target tables (copy_questions); a
+    # question repeated within the batch counts once, the last one
+    question_model, option_model = TARGETS[target]
+    key = [ingest_questions.c[name] for name in QUESTION_NATURAL_KEY]
+    latest = (
+        select(ingest_questions)
+        .distinct(*key)
+        .order_by(*key, ingest_questions.c.id.desc())
+        .cte("latest")
+    )
+    copy = copy_questions(question_model, option_model, latest, ingest_options)
+    return select(
+        select(func.count()).select_from(copy.written).scalar_subquery(),
+        select(func.count()).select_from(copy.options).scalar_subquery(),
+    ).add_cte(copy.replaced)
+
+
+class IngestState:
+    # Progress per file in a JSON file, rewritten after every committed
+    # batch: the byte offset after the last committed record, so a run that
+    # died resumes there. A file that changed since (size, mtime) starts
+    # over. Batches are upserts, so one committed just before a crash and
+    # loaded again does no harm.
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        try:
+            self.files: dict[str, dict[str, Any]] = json.loads(path.read_text())
+        except FileNotFoundError:
+            self.files = {}
+
+    def get(self, path: Path) -> dict[str, Any]:
+        stat_result = path.stat()
+        entry = self.files.get(str(path.resolve()))
+        if (
+            entry is None
+            or entry["size"] != stat_result.st_size
+            or entry["mtime_ns"] != stat_result.st_mtime_ns
+        ):
+            entry = {
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "offset": 0,
+                "in_array": None,
+                "records": 0,
+                "done": False,
+            }
+        return entry
+
+    def save(self, path: Path, entry: dict[str, Any]) -> None:
+        self.files[str(path.resolve())] = entry
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.files, indent=2))
+        os.replace(tmp, self.path)
+
+
+async def create_scratch_tables(connection: AsyncConnection) -> None:
+    await connection.run_sync(_scratch.create_all, checkfirst=False)
+    await connection.commit()
+
+
+async def load_batch(
+    connection: AsyncConnection, target: str, batch: ValidatedBatch
+) -> tuple[int, int]:
+    # COPY into the scratch tables and merge, in one transaction; returns
+    # the questions and options written
+    async with connection.begin():
+        driver = (await connection.get_raw_connection()).driver_connection
+        async with driver.cursor() as cursor:
+            async with cursor.copy(_COPY_QUESTIONS) as copy:
+                for row in batch.questions:
+                    await copy.write_row(row)
+            if batch.options:
+                async with cursor.copy(_COPY_OPTIONS) as copy:
+                    for row in batch.options:
+                        await copy.write_row(row)
+        questions, options = (await connection.execute(merge_statement(target))).one()
+    return questions, options
+
+
+async def ingest_file(
+    connection: AsyncConnection,
+    pool: ProcessPoolExecutor,
+    path: Path,
+    *,
+    target: str,
+    state: IngestState,
+    batch_size: int,
+    ahead: int,
+    rejects: Optional[TextIO],
+) -> tuple[dict[str, int], Optional[ValueError]]:
+    # Reads, validates (in the pool, up to ahead batches ahead of the one
+    # being loaded) and loads the file batch by batch, in file order,
+    # checkpointing after each. Returns the stats and, when malformed JSON
+    # stopped the reading, its ValueError: the records before it are loaded
+    # and the file is not marked done
+    entry = state.get(path)
+    stats = {"records": 0, "questions": 0, "options": 0, "rejected": 0}
+    if entry["done"]:
+        return stats, None
+
+    loop = asyncio.get_running_loop()
+    reader = RecordReader.open(path)
+    reader.resume_at(entry["offset"], entry["in_array"])
+    pending: deque = deque()
+    next_record = entry["records"] + 1
+    exhausted = False
+    error: Optional[ValueError] = None
+    try:
+        while True:
+            while not exhausted and len(pending) < ahead:
+                try:
+                    batch = await asyncio.to_thread(reader.read_batch, batch_size)
+                except ValueError as exc:
+                    error = exc
+                    exhausted = True
+                    break
+                if not batch.records:
+                    exhausted = True
+                    break
+                validated = loop.run_in_executor(
+                    pool, validate_batch, target, next_record, batch.records
+                )
+                next_record += len(batch.records)
+                pending.append(
+                    (validated, len(batch.records), batch.offset, reader.in_array)
+                )
+            if not pending:
+                break
+
+            validated, count, offset, in_array = pending.popleft()
+            result = await validated
+            if result.questions:
+                questions, options = await load_batch(connection, target, result)
+                stats["questions"] += questions
+                stats["options"] += options
+            if rejects is not None:
+                for record, errors in result.rejected:
+                    line = {"file": str(path), "record": record, "errors": errors}
+                    rejects.write(json.dumps(line, default=str) + "\n")
+                rejects.flush()
+            stats["records"] += count
+            stats["rejected"] += len(result.rejected)
+            entry.update(
+                offset=offset, in_array=in_array, records=entry["records"] + count
+            )
+            state.save(path, entry)
+    finally:
+        for validated, *_ in pending:
+            validated.cancel()
+        reader.close()
+
+    if error is None:
+        entry["done"] = True
+        state.save(path, entry)
+    return stats, error
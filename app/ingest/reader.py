@@ -0,0 +1,183 @@
+import codecs
+import json
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, Optional
+
+# Files are read in chunks of this many bytes; a record may span chunks but
+# not exceed MAX_RECORD_SIZE characters
+CHUNK_SIZE = 1 << 20
+MAX_RECORD_SIZE = 64 << 20
+# Line-per-record files: records are cut at newlines, without parsing
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+
+# With the byte order mark, which the decoder keeps so offsets stay exact
+_WHITESPACE = " \t\r\n\ufeff"
+
+
+class Batch(NamedTuple):
+    # JSON text of each record, and the byte offset just after the last
+    # one: reading again from there continues with the next record
+    records: list[str]
+    offset: int
+
+
+class RecordReader:
+    # Streams the question records of one file without loading it whole:
+    # a JSON array of objects, or objects one after another (one object,
+    # NDJSON). The text of each record is handed on as it is, validation
+    # parses it again. Offsets are in bytes, so a load can resume from the
+    # last one it committed (resume_at; state is whether that offset lies
+    # inside the top-level array).
+    def __init__(self, file: BinaryIO, *, ndjson: bool = False) -> None:
+        self.file = file
+        self.ndjson = ndjson
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        # Buffer position just after the last record: _fill keeps the text
+        # from here on, so a batch can still end there when the next record
+        # turns out to be malformed
+        self._mark = 0
+        self._offset = 0
+        self._eof = False
+        # None until the first value shows whether the file is an array
+        self.in_array: Optional[bool] = None
+        # Inside the array, after a record: a comma or "]" comes next
+        self._after_record = False
+        self._closed = False
+        # Malformed JSON met after some records of a batch: raised by the
+        # next read_batch, so the records before it are handed on first
+        self._error: Optional[ValueError] = None
+
+    @classmethod
+    def open(cls, path: Path) -> "RecordReader":
+        return cls(open(path, "rb"), ndjson=path.suffix.lower() in NDJSON_SUFFIXES)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def resume_at(self, offset: int, in_array: Optional[bool]) -> None:
+        self.file.seek(offset)
+        self._offset = offset
+        self.in_array = in_array
+        # Batches end after a record
+        self._after_record = bool(in_array)
+
+    def _fill(self) -> bool:
+        # Appends the next chunk to the buffer; False at the end of the file
+        if self._eof:
+            return False
+        chunk = self.file.read(CHUNK_SIZE)
+        self._eof = not chunk
+        text = self._text.decode(chunk, final=self._eof)
+        if self._mark:
+            self._consume(self._mark)
+        self._buffer += text
+        return bool(chunk)
+
+    def _consume(self, position: Optional[int] = None) -> None:
+        # Drops the text before position (the current one) from the buffer
+        if position is None:
+            position = self._position
+        self._offset = self._byte_offset(position)
+        self._buffer = self._buffer[position:]
+        self._position -= position
+        self._mark = max(self._mark - position, 0)
+
+    def _byte_offset(self, position: Optional[int] = None) -> int:
+        if position is None:
+            position = self._position
+        return self._offset + len(self._buffer[:position].encode("utf-8"))
+
+    def _skip(self, characters: str) -> Optional[str]:
+        # Moves past characters and returns the next one, None at the end
+        while True:
+            buffer = self._buffer
+            position = self._position
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            self._position = position
+            if position < len(buffer):
+                return buffer[position]
+            if not self._fill():
+                return None
+
+    def _next_line(self) -> str:
+        while True:
+            end = self._buffer.find("\n", self._position)
+            if end >= 0 or not self._fill():
+                break
+        if end < 0:
+            end = len(self._buffer)
+        line = self._buffer[self._position : end].strip()
+        self._position = self._mark = min(end + 1, len(self._buffer))
+        return line
+
+    def _next_value(self) -> Optional[str]:
+        if self.in_array is None:
+            first = self._skip(_WHITESPACE)
+            self.in_array = first == "["
+            if self.in_array:
+                self._position += 1
+        current = self._skip(_WHITESPACE)
+        if self._after_record and current == ",":
+            self._position += 1
+            current = self._skip(_WHITESPACE)
+        elif self._after_record and current not in ("]", None):
+            raise ValueError(f"Expected ',' or ']' at byte {self._byte_offset()}")
+        if current is None:
+            if self.in_array and not self._closed:
+                raise ValueError("Unexpected end of file inside the JSON array")
+            return None
+        if self.in_array and current == "]":
+            self._closed = True
+            self._position += 1
+            if self._skip(_WHITESPACE) is not None:
+                raise ValueError("Unexpected data after the JSON array")
+            return None
+
+        while True:
+            try:
+                _, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError as exc:
+                # Cut off at the end of the buffer, or broken: read on until
+                # the record is whole or clearly is not
+                too_long = len(self._buffer) - self._position > MAX_RECORD_SIZE
+                position = self._position
+                if too_long or not self._fill():
+                    # _fill may have dropped text from the front of the buffer
+                    at = self._byte_offset(exc.pos - position + self._position)
+                    raise ValueError(f"Invalid JSON at byte {at}: {exc.msg}") from None
+                continue
+            record = self._buffer[self._position : end]
+            self._position = self._mark = end
+            self._after_record = self.in_array
+            return record
+
+    def read_batch(self, size: int) -> Batch:
+        # Up to size records; fewer only at the end of the file or before
+        # malformed JSON, which the next call raises
+        if self._error is not None:
+            raise self._error
+        records: list[str] = []
+        while len(records) < size:
+            if self.ndjson:
+                if self._skip(_WHITESPACE) is None:
+                    break
+                record = self._next_line()
+            else:
+                try:
+                    record = self._next_value()
+                except ValueError as exc:
+                    if not records:
+                        raise
+                    # End the batch after the last good record
+                    self._error = exc
+                    self._position = self._mark
+                    break
+                if record is None:
+                    break
+            records.append(record)
+        self._consume()
+        return Batch(records, self._offset)
@@ -0,0 +1,67 @@
+from typing import Any, NamedTuple, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from app.db.upsert import OPTION_COLUMNS, QUESTION_COLUMNS
+from app.domain.process_questions.schemas import StageQuestionCreate
+from app.domain.questions.schemas import QuestionCreate
+from app.domain.subjects.taxonomy import TaxonomyResolver
+
+# Runs in the ingest process pool: validate_batch() turns record text into
+# COPY rows, so the loading process only reads files and talks to Postgres
+
+SCHEMAS: dict[str, type[BaseModel]] = {
+    "stage": StageQuestionCreate,
+    "bank": QuestionCreate,
+}
+
+_taxonomy: Optional[TaxonomyResolver] = None
+_resolved: dict[tuple[Any, ...], dict[str, Optional[int]]] = {}
+
+
+class ValidatedBatch(NamedTuple):
+    # (record, *QUESTION_COLUMNS) and (record, *OPTION_COLUMNS) rows, and
+    # (record, errors) for the records that failed validation; record is the
+    # 1-based position in the file
+    questions: list[tuple[Any, ...]]
+    options: list[tuple[Any, ...]]
+    rejected: list[tuple[int, list[dict[str, Any]]]]
+
+
+def init_worker(taxonomy: TaxonomyResolver) -> None:
+    global _taxonomy
+    _taxonomy = taxonomy
+    _resolved.clear()
+
+
+def _resolve(subject: Optional[str], chapter: Optional[str], topic: Optional[str]):
+    # A paper repeats a handful of subject/chapter/topic combinations
+    key = (subject, chapter, topic)
+    ids = _resolved.get(key)
+    if ids is None:
+        ids = _resolved[key] = _taxonomy.resolve(subject, chapter, topic)
+    return ids
+
+
+def validate_batch(target: str, first: int, records: list[str]) -> ValidatedBatch:
+    schema = SCHEMAS[target]
+    batch = ValidatedBatch([], [], [])
+    for record, text in enumerate(records, first):
+        try:
+            payload = schema.model_validate_json(text)
+        except ValidationError as exc:
+            errors = exc.errors(
+                include_url=False, include_context=False, include_input=False
+            )
+            batch.rejected.append((record, errors))
+            continue
+        row = {
+            **payload.model_dump(exclude={"options"}),
+            **_resolve(payload.subject, payload.chapter, payload.topic),
+        }
+        batch.questions.append((record, *(row[name] for name in QUESTION_COLUMNS)))
+        batch.options.extend(
+            (record, *(getattr(option, name) for name in OPTION_COLUMNS))
+            for option in payload.options
+        )
+    return batch
@@ -0,0 +1,66 @@
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError
+
+from app.db.query_stats import expect_repeated_queries
+
+from app.interfaces.api.schemas import BulkItemResult, BulkResult
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def _database_error(exc: DBAPIError) -> list[dict[str, Any]]:
+    # Same shape as pydantic's error entries so clients handle one format
+    message = str(exc.orig).splitlines()[0] if exc.orig else str(exc)
+    return [{"type": "database", "loc": [], "msg": message}]
+
+
+async def bulk_create(
+    items: list[Any],
+    schema: type[T],
+    create_chunk: Callable[[list[T]], Awaitable[list[int]]],
+    chunk_size: int,
+) -> BulkResult:
+    # Validates every item on its own, then hands valid ones to create_chunk
+    # chunk_size at a time. create_chunk writes one chunk in one transaction
+    # and returns the new ids in order, or raises after rolling back. A
+    # failed chunk is retried one item at a time to find the bad rows.
+    results: list[Optional[BulkItemResult]] = [None] * len(items)
+    valid: list[tuple[int, T]] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as exc:
+            errors = exc.errors(
+                include_url=False, include_context=False, include_input=False
+            )
+            results[index] = BulkItemResult(index=index, errors=errors)
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start : start + chunk_size]
+        try:
+            ids = await create_chunk([payload for _, payload in chunk])
+        except DBAPIError as exc:
+            if len(chunk) == 1:
+                index = chunk[0][0]
+                results[index] = BulkItemResult(
+                    index=index, errors=_database_error(exc)
+                )
+                continue
+            expect_repeated_queries()
+            for index, payload in chunk:
+                try:
+                    [new_id] = await create_chunk([payload])
+                except DBAPIError as item_exc:
+                    errors = _database_error(item_exc)
+                    results[index] = BulkItemResult(index=index, errors=errors)
+                else:
+                    results[index] = BulkItemResult(index=index, id=new_id)
+            continue
+
+        for (index, _), new_id in zip(chunk, ids):
+            results[index] = BulkItemResult(index=index, id=new_id)
+
+    created = sum(1 for result in results if result.id is not None)
+    return BulkResult(created=created, failed=len(items) - created, items=results)
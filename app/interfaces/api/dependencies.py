@@ -0,0 +1,15 @@
+from collections.abc import AsyncGenerator
+
+from fastapi import Request
+
+from app.core.metrics import IN_FLIGHT
+
+
+async def track_in_flight(request: Request) -> AsyncGenerator[None, None]:
+    # Runs after routing, so the route template is already known here
+    gauge = IN_FLIGHT.labels(request.method, request.scope["route"].path)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
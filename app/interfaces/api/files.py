@@ -0,0 +1,61 @@
+import os
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request, status
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+# Headers a 304 repeats from the full response
+_VALIDATOR_HEADERS = ("etag", "last-modified", "cache-control")
+
+
+def _not_modified(request_headers: Headers, response_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 asks for If-None-Match
+        etag = response_headers["etag"].removeprefix("W/")
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(response_headers["last-modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    return False
+
+
+def conditional_file_response(
+    request: Request,
+    path: Path,
+    *,
+    stat_result: os.stat_result,
+    media_type: Optional[str] = None,
+    cache_control: str,
+    etag: Optional[str] = None,
+) -> Response:
+    # FileResponse hands the path to the server (http.response.pathsend)
+    # when it can and handles Range/If-Range, but always sends the body;
+    # this answers If-None-Match and If-Modified-Since with a 304. Without
+    # etag, Starlette's mtime/size one is used.
+    headers = {"Cache-Control": cache_control}
+    if etag is not None:
+        headers["ETag"] = etag
+    response = FileResponse(
+        path, media_type=media_type, headers=headers, stat_result=stat_result
+    )
+    if _not_modified(request.headers, response.headers):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={
+                name: response.headers[name]
+                for name in _VALIDATOR_HEADERS
+                if name in response.headers
+            },
+        )
+    return response
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+from app.db.session import get_pool_status, replicas
+from app.interfaces.api import schemas
+
+router = APIRouter(prefix="/_internal", tags=["internal"], include_in_schema=False)
+
+# Mounted at the application root, outside /api
+metrics_router = APIRouter(include_in_schema=False)
+
+
+@router.get("/pool", response_model=list[schemas.PoolStatusRead])
+async def pool_status():
+    return get_pool_status()
+
+
+@router.get("/replicas", response_model=list[schemas.ReplicaStatusRead])
+async def replica_status():
+    return replicas.status()
+
+
+@metrics_router.get("/metrics")
+async def metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,122 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import REQUEST_LATENCY, REQUESTS, RESPONSE_SIZE
+from app.db.query_stats import (
+    current_query_stats,
+    start_query_stats,
+    stop_query_stats,
+)
+from app.db.routing import reset_read_only, set_read_only
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Set after a successful write; holds the unix time until which this client's
+# reads stay on the primary so it sees its own writes
+STICKY_COOKIE = "rewise_primary_until"
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, app: ASGIApp, sticky_seconds: int) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in SAFE_METHODS:
+            token = set_read_only(not self._is_sticky(scope))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                reset_read_only(token)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.sticky_seconds
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={until}; Max-Age={self.sticky_seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _is_sticky(self, scope: Scope) -> bool:
+        value = HTTPConnection(scope).cookies.get(STICKY_COOKIE)
+        if not value:
+            return False
+        try:
+            return int(value) > time.time()
+        except ValueError:
+            return False
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router leaves the matched route in the scope; label by its
+            # template so ids in the path do not explode label cardinality
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, template).observe(
+                time.perf_counter() - start
+            )
+            RESPONSE_SIZE.labels(method, template).observe(response_size)
+            REQUESTS.labels(method, template, str(status_code)).inc()
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, repeat_threshold: int, strict: bool) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.strict = strict
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_query_stats(self.repeat_threshold, self.strict)
+        stats = current_query_stats()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stop_query_stats(token)
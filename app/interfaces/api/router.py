@@ -1,14 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
 from app.domain.questions.routers import router as questions_router
 from app.domain.users.routers import router as users_router
 from app.domain.process_questions.routers import router as process_questions_router
 from app.domain.subjects.routers import router as subjects_router
 from app.domain.test.routers import router as test_router
+from app.domain.diagrams.routers import router as diagrams_router
+from app.interfaces.api.dependencies import track_in_flight
+from app.interfaces.api.internal import router as internal_router
 
-api_router = APIRouter()
+api_router = APIRouter(dependencies=[Depends(track_in_flight)])
 api_router.include_router(users_router)
 api_router.include_router(questions_router)
 api_router.include_router(process_questions_router)
 api_router.include_router(subjects_router)
 api_router.include_router(test_router)
+api_router.include_router(diagrams_router)
+api_router.include_router(internal_router)
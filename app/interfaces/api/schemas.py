@@ -0,0 +1,81 @@
+from typing import Any, Generic, Optional, TypeVar, Union
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    # Pass as ?cursor= to fetch the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
+class Batch(BaseModel, Generic[T]):
+    # Found items, in the order their ids were requested
+    items: list[T]
+    # Requested ids that do not exist
+    missing: list[int] = []
+
+    model_config = {"from_attributes": True}
+
+
+class Changes(BaseModel, Generic[T]):
+    # Created or updated items, oldest change first
+    items: list[T]
+    # Ids of items deleted since the watermark; apply after items
+    deleted: list[int] = []
+    # Pass as ?since= on the next call
+    watermark: str
+    # More changes are waiting: call again with watermark right away
+    has_more: bool = False
+
+    model_config = {"from_attributes": True}
+
+
+class HistogramBucket(BaseModel):
+    le: str
+    count: int
+
+
+class PoolStatusRead(BaseModel):
+    name: str
+    pool_class: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: int
+    wait_seconds_total: float
+    timeouts: int
+    wait_histogram: list[HistogramBucket]
+
+
+class ReplicaStatusRead(BaseModel):
+    name: str
+    healthy: bool
+    lag_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class FacetCount(BaseModel):
+    # null counts the rows without a value
+    value: Optional[Union[bool, str]] = None
+    count: int
+
+
+class BulkItemResult(BaseModel):
+    # Position of the item in the request body
+    index: int
+    # Set when the item was written
+    id: Optional[int] = None
+    # Validation or database errors when it was not
+    errors: Optional[list[dict[str, Any]]] = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    items: list[BulkItemResult]
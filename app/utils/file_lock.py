@@ -0,0 +1,18 @@
+import fcntl
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+@contextmanager
+def try_lock(path: Path) -> Iterator[bool]:
+    # Non-blocking exclusive flock on path, held until the block exits.
+    # Yields False when another process (or another open of the file in
+    # this one) holds it.
+    with open(path, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
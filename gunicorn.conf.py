@@ -0,0 +1,52 @@
+# Production server settings, picked up automatically by `gunicorn main:app`
+# from the working directory. Values come from app settings (WEB_* in .env).
+import os
+import shutil
+import tempfile
+
+from app.core.config import settings
+
+# Metrics from every worker are aggregated through files in this directory;
+# prometheus_client reads it at import time, so it has to be set before the
+# app is preloaded below
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="rewise-metrics-")
+
+bind = f"{settings.WEB_HOST}:{settings.WEB_PORT}"
+worker_class = "uvicorn_worker.UvicornWorker"
+# Async workers: one per core is enough to keep every core busy
+workers = settings.WEB_WORKERS or os.cpu_count() or 1
+backlog = settings.WEB_BACKLOG
+keepalive = settings.WEB_KEEPALIVE
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+# Import the app once in the master and fork workers from it, so module
+# state is shared copy-on-write. `kill -HUP <master>` still restarts
+# workers gracefully but does not reload code; deploy new code with
+# `kill -USR2` (re-exec) or a full restart.
+preload_app = True
+
+accesslog = "-"
+
+
+def on_starting(server):
+    # Files left by a previous run would be summed into the new counters
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def post_fork(server, worker):
+    from app.db.session import reset_engines_after_fork
+
+    reset_engines_after_fork()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drops the live gauges (in-flight requests) of the exited worker
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,11 +1,81 @@
-from fastapi import FastAPI
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+from pathlib import Path
 
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.db.pagination import InvalidCursorError
+from app.db.session import dispose_engines, replicas
+from app.domain.diagrams.derivatives import refresh_periodically, shutdown_pool
+from app.domain.questions.bundles import rebuild_periodically
+from app.interfaces.api.internal import metrics_router
+from app.interfaces.api.middleware import (
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    ReplicaRoutingMiddleware,
+)
 from app.interfaces.api.router import api_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = []
+    if replicas:
+        tasks.append(
+            asyncio.create_task(
+                replicas.monitor(settings.DB_REPLICA_LAG_CHECK_INTERVAL)
+            )
+        )
+    if settings.BUNDLE_REBUILD_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(
+                rebuild_periodically(
+                    Path(settings.BUNDLE_DIR), settings.BUNDLE_REBUILD_INTERVAL
+                )
+            )
+        )
+    if settings.DIAGRAM_DERIVATIVE_INTERVAL > 0:
+        tasks.append(
+            asyncio.create_task(
+                refresh_periodically(settings.DIAGRAM_DERIVATIVE_INTERVAL)
+            )
+        )
+    yield
+    for task in tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    shutdown_pool()
+    await dispose_engines()
+
+
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="rewise_neet_server", version="0.1.0")
+    app = FastAPI(title="rewise_neet_server", version="0.1.0", lifespan=lifespan)
     app.include_router(api_router, prefix="/api")
+    app.include_router(metrics_router)
+    app.add_exception_handler(InvalidCursorError, invalid_cursor_handler)
+
+    if replicas:
+        app.add_middleware(
+            ReplicaRoutingMiddleware,
+            sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS,
+        )
+    app.add_middleware(
+        QueryStatsMiddleware,
+        repeat_threshold=settings.DB_QUERY_REPEAT_THRESHOLD,
+        strict=settings.DB_QUERY_STRICT,
+    )
+    # Added last so it wraps everything else
+    app.add_middleware(MetricsMiddleware)
 
     return app
 
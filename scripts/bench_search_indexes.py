@@ -0,0 +1,211 @@
+"""Planner benchmark for the question search filter combinations.
+
+Seeds N synthetic questions into questions or stage_questions, then runs
+EXPLAIN ANALYZE on the search query of each filter combination the routers
+send, once with the indexes the models define ("after") and once with only
+the original single-column indexes ("before"). Everything runs in one
+transaction that is rolled back, so the database is left as it was, but
+the table is locked while it runs: point it at a dev database.
+
+    uv run python -m scripts.bench_search_indexes --rows 200000
+    uv run python -m scripts.bench_search_indexes --table stage_questions
+"""
+
+import argparse
+import json
+import statistics
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import engine
+from app.domain.process_questions.models import StageQuestion
+from app.domain.process_questions.repository import (
+    STAGE_QUESTION_PAPER_ORDER,
+    STAGE_QUESTION_SEARCH_LOAD,
+    StageQuestionRepository,
+)
+from app.domain.questions.models import Question
+from app.domain.questions.repository import (
+    QUESTION_PAPER_ORDER,
+    QUESTION_SEARCH_LOAD,
+    QuestionRepository,
+)
+
+TABLES = {
+    "questions": (
+        Question,
+        QuestionRepository,
+        QUESTION_SEARCH_LOAD,
+        QUESTION_PAPER_ORDER,
+    ),
+    "stage_questions": (
+        StageQuestion,
+        StageQuestionRepository,
+        STAGE_QUESTION_SEARCH_LOAD,
+        STAGE_QUESTION_PAPER_ORDER,
+    ),
+}
+
+# Indexes of the original schema, before any composite ones
+BASELINE_COLUMNS = [
+    "id",
+    "source",
+    "year",
+    "subject",
+    "chapter",
+    "topic",
+    "question_number",
+]
+
+# Share of seeded rows already reviewed: most of the bank, little of staging
+REVIEWED_RATIO = {"questions": 0.9, "stage_questions": 0.2}
+
+# Filter combinations sent by the admin and practice screens
+COMBINATIONS = [
+    {"year": "2016"},
+    {"source": "NEET", "year": "2016"},
+    {"subject": "Physics"},
+    {"subject": "Physics", "chapter": "Physics 7"},
+    {"subject": "Physics", "chapter": "Physics 7", "year": "2016"},
+    {"chapter": "Physics 7"},
+    {"reviewed": False},
+    {"source": "NEET", "year": "2016", "reviewed": False},
+    {"subject": "Physics", "chapter": "Physics 7", "reviewed": False},
+    {"year": "2016", "reviewed": True},
+]
+
+# 180 questions per paper: Physics 1-45, Chemistry 46-90, Biology 91-180.
+# Papers cycle through 6 sources and 38 years; each further cycle gets its
+# own sources ("NEET 2", ...), as (source, year, question_number) is unique;
+# papers the database already holds are left as they are.
+SEED_SQL = """
+INSERT INTO {table} (
+    source, year, subject, chapter, topic, question_number,
+    question_text, has_diagram, reviewed
+)
+SELECT
+    (ARRAY['NEET', 'AIPMT', 'AIIMS', 'JIPMER', 'MOCK', 'NCERT'])[paper % 6 + 1]
+        || CASE WHEN paper >= 228 THEN ' ' || (paper / 228 + 1) ELSE '' END,
+    (1988 + (paper / 6) % 38)::text,
+    subject,
+    subject || ' ' || (1 + floor(random() * 30))::int,
+    'Topic ' || (1 + floor(random() * 10))::int,
+    (number)::text,
+    repeat('question text ', 20),
+    random() < 0.1,
+    random() < :reviewed_ratio
+FROM (
+    SELECT
+        g / 180 AS paper,
+        g % 180 + 1 AS number,
+        CASE WHEN g % 180 < 45 THEN 'Physics'
+             WHEN g % 180 < 90 THEN 'Chemistry'
+             ELSE 'Biology' END AS subject
+    FROM generate_series(0, :rows - 1) AS g
+) AS seed
+ON CONFLICT DO NOTHING
+"""
+
+
+def search_sql(table: str, filters: dict) -> str:
+    model, repository, load, order = TABLES[table]
+    stmt = repository._filter(select(model).options(*load), **filters)
+    stmt = stmt.order_by(*order)
+    compiled = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    return str(compiled)
+
+
+def plan_summary(plan: dict) -> str:
+    # Scan nodes with their index, plus whether a Sort was needed
+    nodes = []
+
+    def walk(node: dict) -> None:
+        kind = node["Node Type"]
+        if kind == "Sort" or "Scan" in kind:
+            index = node.get("Index Name")
+            nodes.append(f"{kind}({index})" if index else kind)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan)
+    return " > ".join(nodes)
+
+
+def explain(conn, sql: str, repeat: int) -> tuple[float, int, str]:
+    timings = []
+    for _ in range(repeat):
+        result = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+        output = result.scalar_one()
+        if isinstance(output, str):
+            output = json.loads(output)
+        timings.append(output[0]["Execution Time"])
+    plan = output[0]["Plan"]
+    return statistics.median(timings), plan["Actual Rows"], plan_summary(plan)
+
+
+def rebuild_indexes(conn, table: str, baseline: bool) -> None:
+    # Both sets are built fresh on the seeded rows, so neither is measured
+    # with the bloat of indexes grown row by row during the seed
+    names = conn.scalars(
+        text(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE tablename = :table AND indexname <> :pkey"
+        ),
+        {"table": table, "pkey": f"{table}_pkey"},
+    ).all()
+    for name in names:
+        conn.exec_driver_sql(f'DROP INDEX "{name}"')
+    if baseline:
+        for column in BASELINE_COLUMNS:
+            conn.exec_driver_sql(
+                f"CREATE INDEX ix_{table}_{column} ON {table} ({column})"
+            )
+    else:
+        for index in TABLES[table][0].__table__.indexes:
+            index.create(conn)
+    conn.exec_driver_sql(f"ANALYZE {table}")
+
+
+def run(conn, table: str, repeat: int) -> list[tuple[float, int, str]]:
+    return [explain(conn, search_sql(table, combo), repeat) for combo in COMBINATIONS]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--table", choices=list(TABLES), default="questions")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query")
+    parser.add_argument("--seed", type=float, default=0.42, help="random seed")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("SELECT setseed(:seed)"), {"seed": args.seed})
+            conn.execute(
+                text(SEED_SQL.format(table=args.table)),
+                {"rows": args.rows, "reviewed_ratio": REVIEWED_RATIO[args.table]},
+            )
+            total = conn.exec_driver_sql(f"SELECT count(*) FROM {args.table}").scalar()
+            print(f"{args.table}: {total} rows, median of {args.repeat} runs\n")
+
+            rebuild_indexes(conn, args.table, baseline=True)
+            before = run(conn, args.table, args.repeat)
+            rebuild_indexes(conn, args.table, baseline=False)
+            after = run(conn, args.table, args.repeat)
+        finally:
+            conn.rollback()
+
+    for combo, (b_ms, rows, b_plan), (a_ms, _, a_plan) in zip(
+        COMBINATIONS, before, after
+    ):
+        label = ", ".join(f"{key}={value}" for key, value in combo.items())
+        print(f"{label}  ({rows} rows)")
+        print(f"  before {b_ms:9.2f} ms  {b_plan}")
+        print(f"  after  {a_ms:9.2f} ms  {a_plan}")
+
+
+if __name__ == "__main__":
+    main()